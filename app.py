@@ -1,34 +1,110 @@
 # Importing the necessary modules from Flask
 from flask import Flask, render_template
-from extensions import db
-from flask_bootstrap import Bootstrap
-from feedback import feedback_bp
-import os
+from extensions import db, bootstrap
+from config import Config
+from datetime import datetime
+import click
+import threading
 
-# Create a Flask application and specify the template folder
-app = Flask(__name__, static_folder='static')
+def create_app(config=Config):
+    """Application factory that builds and configures a new Flask app.
 
-# Set the secret key to enable flash functionality
-app.secret_key = 'supersecretkey'
+    ``config`` may be a configuration class/object or a mapping of settings.
+    Blueprint imports and schema creation are deferred so that importing this
+    module stays cheap for workers and test runs.
+    """
+    # Create a Flask application and specify the template folder
+    app = Flask(__name__, static_folder='static')
 
-# Initialising Flask-Bootstrap to manage the layout and components
-bootstrap = Bootstrap(app)
+    # Load the configuration
+    if isinstance(config, dict):
+        app.config.from_mapping(config)
+    else:
+        app.config.from_object(config)
 
-# Setting up the database
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///your_database.db'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    # Initialising Flask-Bootstrap to manage the layout and components
+    bootstrap.init_app(app)
 
-# Initialise the database with the app
-db.init_app(app)
+    # Initialise the database with the app
+    db.init_app(app)
 
-# Register the Feedback Blueprint with a URL prefix
-app.register_blueprint(feedback_bp, url_prefix='/feedback')
+    # Register the Feedback Blueprint with a URL prefix (imported here so the
+    # routes and models are only loaded when an app is actually built)
+    from feedback import feedback_bp
+    app.register_blueprint(feedback_bp, url_prefix='/feedback')
 
-@app.route('/')
-def home():
-    return render_template('base.html')
+    # Attach the read-only per-year partitions to every database connection
+    if app.config.get("PARTITION_DIR"):
+        from feedback.partitions import register_partitions
+        register_partitions(app)
+
+    @app.route('/')
+    def home():
+        return render_template('base.html')
+
+    @app.cli.command("init-db")
+    def init_db():
+        """Create all database tables."""
+        db.create_all()
+        print("Database tables created.")
+
+    @app.cli.command("backfill-rollups")
+    def backfill_rollups():
+        """Rebuild the daily trend rollups from the full feedback history."""
+        from feedback.rollups import backfill_daily_rollups
+        db.create_all()
+        print(f"Daily rollups rebuilt: {backfill_daily_rollups()} rows.")
+
+    @app.cli.command("seed-changes")
+    def seed_changes():
+        """Add existing feedback comments to the change feed."""
+        from feedback.changes import seed_change_log
+        db.create_all()
+        print(f"Change feed seeded: {seed_change_log()} comments added.")
+
+    @app.cli.command("build-similarity-index")
+    def build_similarity_index():
+        """Rebuild the near-duplicate index from every stored comment."""
+        from feedback.similarity import rebuild_similarity_index
+        db.create_all()
+        print(f"Similarity index rebuilt: {rebuild_similarity_index()} comments indexed.")
+
+    @app.cli.command("partition-feedback")
+    @click.option("--before", "before_year", type=int, default=lambda: datetime.now().year,
+                  help="Move comments created before this year (default: the current year).")
+    def partition(before_year):
+        """Move complete past years of feedback into read-only per-year partition files."""
+        from feedback.partitions import partition_feedback
+        if not app.config.get("PARTITION_DIR"):
+            print("PARTITION_DIR is not set, nothing to partition.")
+            return
+        db.create_all()
+        moved = partition_feedback(before_year)
+        for year, count in sorted(moved.items()):
+            print(f"{year}: {count} comments moved to its partition.")
+        print(f"Partitioning complete: {sum(moved.values())} comments moved.")
+
+    if app.config.get("CREATE_SCHEMA_ON_FIRST_REQUEST", False):
+        _register_lazy_schema_creation(app)
+
+    return app
+
+def _register_lazy_schema_creation(app):
+    """Create the database schema once, just before the first request is handled."""
+    lock = threading.Lock()
+    state = {"created": False}
+
+    @app.before_request
+    def create_schema():
+        if state["created"]:
+            return
+        with lock:
+            if not state["created"]:
+                db.create_all()
+                state["created"] = True
 
 if __name__ == "__main__":
+    app = create_app()
     with app.app_context():
         db.create_all()
     app.run(debug=True)
@@ -0,0 +1,121 @@
+import http.client
+import json
+import multiprocessing
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.serving import BaseWSGIServer
+from app import create_app
+from config import Config
+from extensions import db
+
+DURATION = 5  # Seconds per scenario
+WRITERS = 8  # Concurrent bulk upload clients
+BATCH_SIZE = 200  # Feedback entries per bulk upload
+WORKER_THREADS = 4  # Request threads in the server, like a production server's fixed worker pool
+
+class PooledWSGIServer(BaseWSGIServer):
+    """Development server handling requests on a fixed pool of threads instead of one thread each."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pool = ThreadPoolExecutor(WORKER_THREADS)
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self._handle, request, client_address)
+
+    def _handle(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+def request(port, method, path, body=None):
+    """Send one request on a new connection and return the response status."""
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+    headers = {"Content-Type": "application/json"} if body is not None else {}
+    connection.request(method, path, body=json.dumps(body) if body is not None else None, headers=headers)
+    response = connection.getresponse()
+    response.read()
+    connection.close()
+    return response.status, response.getheader("Retry-After")
+
+def reader(port, stop, latencies):
+    """Load dashboard pages back to back, recording each latency in milliseconds."""
+    while not stop.is_set():
+        start = time.perf_counter()
+        request(port, "GET", f"/feedback/?page={random.randint(1, 20)}")
+        latencies.append((time.perf_counter() - start) * 1000)
+
+def writer(port, stop, statuses):
+    """Send bulk uploads back to back, backing off briefly when turned away."""
+    rng = random.Random()
+    while not stop.is_set():
+        body = {"feedbacks": [
+            {"category": "Load", "description": f"Load test comment {rng.getrandbits(64):x} {rng.getrandbits(64):x}",
+             "resolved_status": "No", "priority_level": "Low", "related_section": "Appendix", "assigned_to": "Load"}
+            for _ in range(BATCH_SIZE)
+        ]}
+        status, retry_after = request(port, "POST", "/feedback/bulk-upload", body)
+        statuses[status] += 1
+        if retry_after:
+            time.sleep(0.1)  # Shortened from Retry-After to keep the writers saturated
+
+def serve(path, settings, ports):
+    """Serve a fresh app on a free port, in its own process so the load clients do not share its GIL."""
+    class LoadConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{path}"
+    for key, value in settings.items():
+        setattr(LoadConfig, key, value)
+
+    app = create_app(LoadConfig)
+    with app.app_context():
+        db.create_all()
+    server = PooledWSGIServer("127.0.0.1", 0, app)
+    ports.put(server.server_port)
+    server.serve_forever()
+
+def run_scenario(name, writers, settings):
+    """Measure dashboard latency against a fresh server with ``writers`` bulk writers running."""
+    path = os.path.join(tempfile.mkdtemp(), "load.db")
+    ports = multiprocessing.Queue()
+    server = multiprocessing.Process(target=serve, args=(path, settings, ports), daemon=True)
+    server.start()
+    port = ports.get()
+    request(port, "POST", "/feedback/bulk-upload", {"feedbacks": [
+        {"category": "Seed", "description": f"Seed comment number {i} for the dashboard", "resolved_status": "No",
+         "priority_level": "Low", "related_section": "Appendix", "assigned_to": "Seed"} for i in range(100)
+    ]})
+
+    stop = threading.Event()
+    latencies, statuses = [], Counter()
+    threads = [threading.Thread(target=reader, args=(port, stop, latencies))]
+    threads += [threading.Thread(target=writer, args=(port, stop, statuses)) for _ in range(writers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(DURATION)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    server.terminate()
+    server.join()
+
+    latencies.sort()
+    p99 = latencies[max(int(len(latencies) * 0.99) - 1, 0)]
+    writes = ", ".join(f"{status}: {count}" for status, count in sorted(statuses.items())) or "-"
+    print(f"  {name:<28} reads {len(latencies):5d}   p50 {statistics.median(latencies):8.2f}   p99 {p99:8.2f}   writes {writes}")
+
+if __name__ == "__main__":
+    writers = int(sys.argv[1]) if len(sys.argv) > 1 else WRITERS
+    print(f"Dashboard read latency (milliseconds) over {DURATION}s, {writers} saturating bulk writers:")
+    run_scenario("reads only", 0, {})
+    run_scenario("writers, admission control", writers, {})
+    run_scenario("writers, no admission limit", writers, {"WRITE_CONCURRENCY_LIMIT": writers, "WRITE_QUEUE_LIMIT": writers})
@@ -0,0 +1,62 @@
+import csv
+import random
+import statistics
+import sys
+import time
+from app import create_app
+from config import TestingConfig
+from extensions import db
+from feedback.models import Feedback
+from feedback.similarity import find_similar, rebuild_similarity_index
+
+ROWS = 5000
+LOOKUPS = 200
+
+def synthetic_descriptions(count):
+    """Generate varied descriptions by mixing words from the sample feedback data."""
+    with open('feedback_data.csv', mode='r') as csv_file:
+        words = " ".join(row['Description'] for row in csv.DictReader(csv_file)).split()
+    rng = random.Random(1)
+    return [" ".join(rng.choice(words) for _ in range(rng.randint(8, 40))) for _ in range(count)]
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else ROWS
+    app = create_app(TestingConfig)
+
+    with app.app_context():
+        db.create_all()
+        descriptions = synthetic_descriptions(rows)
+        db.session.execute(db.insert(Feedback), [
+            {"category_id": 1, "description": description, "resolved": False} for description in descriptions
+        ])
+        rebuild_similarity_index()
+
+        # Look up lightly edited copies of existing comments, so every lookup has a match
+        rng = random.Random(2)
+        samples = []
+        for description in rng.sample(descriptions, LOOKUPS):
+            query = description.replace(" ", "  ", 1) + "."
+            start = time.perf_counter()
+            find_similar(query, app.config["NEAR_DUPLICATE_THRESHOLD"])
+            samples.append((time.perf_counter() - start) * 1000)
+
+        samples.sort()
+        print(f"Near-duplicate lookups against {rows} comments (milliseconds):")
+        print(f"  median {statistics.median(samples):.3f}   p99 {samples[int(len(samples) * 0.99) - 1]:.3f}   max {samples[-1]:.3f}")
+
+        # A comment stored many times, e.g. the same appendix remark on every document
+        db.session.execute(db.delete(Feedback))
+        db.session.execute(db.insert(Feedback), [
+            {"category_id": 1, "description": descriptions[0], "resolved": False} for _ in range(rows)
+        ])
+        rebuild_similarity_index()
+        samples = []
+        for _ in range(LOOKUPS):
+            start = time.perf_counter()
+            find_similar(descriptions[0] + ".", app.config["NEAR_DUPLICATE_THRESHOLD"])
+            samples.append((time.perf_counter() - start) * 1000)
+
+        samples.sort()
+        print(f"Near-duplicate lookups against {rows} copies of one comment (milliseconds):")
+        print(f"  median {statistics.median(samples):.3f}   p99 {samples[int(len(samples) * 0.99) - 1]:.3f}   max {samples[-1]:.3f}")
+        db.drop_all()
@@ -0,0 +1,35 @@
+import json
+import statistics
+import subprocess
+import sys
+
+# Code run in a fresh interpreter for every sample so nothing is cached between runs
+PROBE = """
+import json, time
+t0 = time.perf_counter()
+from app import create_app
+from config import TestingConfig
+t1 = time.perf_counter()
+app = create_app(TestingConfig)
+t2 = time.perf_counter()
+response = app.test_client().get("/feedback/")
+t3 = time.perf_counter()
+assert response.status_code == 200, response.status_code
+print(json.dumps({"import": t1 - t0, "create_app": t2 - t1, "first_request": t3 - t2, "total": t3 - t0}))
+"""
+
+RUNS = 10
+
+def run_probe():
+    """Run the probe in a new Python process and return its timings in seconds."""
+    output = subprocess.run([sys.executable, "-c", PROBE], capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+if __name__ == "__main__":
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else RUNS
+    samples = [run_probe() for _ in range(runs)]
+
+    print(f"Cold start over {runs} fresh interpreters (milliseconds):")
+    for phase in ["import", "create_app", "first_request", "total"]:
+        values = [sample[phase] * 1000 for sample in samples]
+        print(f"  {phase:<14} median {statistics.median(values):8.2f}   min {min(values):8.2f}   max {max(values):8.2f}")
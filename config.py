@@ -0,0 +1,46 @@
+import os
+from sqlalchemy.pool import SingletonThreadPool
+
+class Config:
+    """Default configuration used when running the app locally."""
+    # Secret key to enable flash functionality
+    SECRET_KEY = os.environ.get("SECRET_KEY", "supersecretkey")
+
+    # Setting up the database
+    SQLALCHEMY_DATABASE_URI = os.environ.get("DATABASE_URL", "sqlite:///your_database.db")
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Create the schema lazily on the first request instead of at start-up
+    CREATE_SCHEMA_ON_FIRST_REQUEST = True
+
+    # Minimum character n-gram similarity for two comments to count as near-duplicates
+    # (0.6 to 1; the index misses most matches below 0.6)
+    NEAR_DUPLICATE_THRESHOLD = float(os.environ.get("NEAR_DUPLICATE_THRESHOLD", 0.8))
+
+    # Admission control for the bulk write endpoints
+    BULK_MAX_CONTENT_LENGTH = int(os.environ.get("BULK_MAX_CONTENT_LENGTH", 1024 * 1024))  # Bytes per request body
+    BULK_MAX_ITEMS = int(os.environ.get("BULK_MAX_ITEMS", 1000))  # Feedback entries or ids per request
+    # SQLite has a single writer, so extra concurrent writes only wait on its lock. Running and
+    # queued writes together should stay below the server's worker count to leave room for reads
+    WRITE_CONCURRENCY_LIMIT = int(os.environ.get("WRITE_CONCURRENCY_LIMIT", 1))  # Write requests running at once
+    WRITE_QUEUE_LIMIT = int(os.environ.get("WRITE_QUEUE_LIMIT", 2))  # Write requests allowed to wait for a slot
+    WRITE_QUEUE_TIMEOUT = float(os.environ.get("WRITE_QUEUE_TIMEOUT", 5))  # Seconds to wait for a slot
+    WRITE_RETRY_AFTER = int(os.environ.get("WRITE_RETRY_AFTER", 5))  # Seconds sent in Retry-After
+
+    # Directory of the read-only per-year partition files (relative paths live in the instance folder)
+    PARTITION_DIR = os.environ.get("PARTITION_DIR", "partitions")
+    PARTITION_MMAP_SIZE = int(os.environ.get("PARTITION_MMAP_SIZE", 256 * 1024 * 1024))  # Bytes memory-mapped per partition
+    # SQLite attaches at most 10 databases per connection, so older partitions are merged past this many files
+    PARTITION_MAX_ATTACHED = int(os.environ.get("PARTITION_MAX_ATTACHED", 8))
+
+class TestingConfig(Config):
+    """Configuration for the test suite, backed by an in-memory shared-cache SQLite database."""
+    TESTING = True
+
+    # A named in-memory database shared by every connection in the process,
+    # so no file is touched and each run starts from a clean slate
+    SQLALCHEMY_DATABASE_URI = "sqlite:///file:feedback_test?mode=memory&cache=shared&uri=true"
+    SQLALCHEMY_ENGINE_OPTIONS = {"poolclass": SingletonThreadPool}
+
+    # No partition files unless a test sets a directory
+    PARTITION_DIR = None
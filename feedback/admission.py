@@ -0,0 +1,68 @@
+import threading
+from functools import wraps
+from flask import current_app, jsonify, request
+
+class WriteGate:
+    """Bounded concurrency for write-heavy endpoints, with a bounded queue of waiting requests."""
+
+    def __init__(self, concurrency, queue_limit):
+        self.semaphore = threading.BoundedSemaphore(concurrency)
+        self.queue_limit = queue_limit
+        self.waiting = 0
+        self.lock = threading.Lock()
+
+def get_write_gate(app):
+    """Return the app's write gate, creating it from the configuration on first use."""
+    gate = app.extensions.get("write_gate")
+    if gate is None:
+        with _gate_creation_lock:
+            gate = app.extensions.get("write_gate")
+            if gate is None:
+                gate = WriteGate(app.config["WRITE_CONCURRENCY_LIMIT"], app.config["WRITE_QUEUE_LIMIT"])
+                app.extensions["write_gate"] = gate
+    return gate
+
+_gate_creation_lock = threading.Lock()
+
+def _retry_later(message, status):
+    """Build a JSON error response asking the client to retry later."""
+    return jsonify({"error": message}), status, {"Retry-After": str(current_app.config["WRITE_RETRY_AFTER"])}
+
+def admission_controlled(view):
+    """Limit the body size and the number of concurrent requests of a write-heavy route.
+
+    Oversized bodies get a 413. When all write slots are busy, a request waits for
+    up to WRITE_QUEUE_TIMEOUT seconds (503 if none frees up); when the queue is
+    already full it is turned away immediately with a 429.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        config = current_app.config
+
+        # Reject oversized bodies before reading them
+        max_length = config["BULK_MAX_CONTENT_LENGTH"]
+        if request.content_length is not None and request.content_length > max_length:
+            return jsonify({"error": f"Request body too large. The limit is {max_length} bytes."}), 413
+        request.max_content_length = max_length  # Also enforced while streaming bodies without a length
+
+        # Take a free slot straight away, or join the queue if there is room
+        gate = get_write_gate(current_app)
+        if not gate.semaphore.acquire(blocking=False):
+            with gate.lock:
+                if gate.waiting >= gate.queue_limit:
+                    return _retry_later("Too many write requests are waiting. Please retry later.", 429)
+                gate.waiting += 1
+            try:
+                acquired = gate.semaphore.acquire(timeout=config["WRITE_QUEUE_TIMEOUT"])
+            finally:
+                with gate.lock:
+                    gate.waiting -= 1
+            if not acquired:
+                return _retry_later("The server is busy with other write requests. Please retry later.", 503)
+
+        try:
+            return view(*args, **kwargs)
+        finally:
+            gate.semaphore.release()
+
+    return wrapper
@@ -0,0 +1,33 @@
+from datetime import datetime, timezone
+from extensions import db
+from sqlalchemy import insert, select
+from .models import FeedbackChange
+from .partitions import feedback_source
+
+def record_changes(connection, feedback_ids, operation):
+    """Record ``operation`` as the latest change for each feedback id.
+
+    Any earlier entry for the same comment is replaced, so the log holds at most
+    one row per comment and a sync only has to read what changed since its cursor.
+    """
+    if not feedback_ids:
+        return
+    changed_at = datetime.now(timezone.utc)
+    statement = insert(FeedbackChange).prefix_with("OR REPLACE")
+    connection.execute(statement, [
+        {"feedback_id": feedback_id, "operation": operation, "changed_at": changed_at}
+        for feedback_id in feedback_ids
+    ])
+
+def seed_change_log():
+    """Add an insert entry for every comment missing from the change log and return how many were added.
+
+    Used once on databases that already held feedback before the change log existed,
+    partitioned comments included.
+    """
+    source = feedback_source()
+    missing = select(source.id).where(source.id.not_in(select(FeedbackChange.feedback_id))).order_by(source.id)
+    feedback_ids = [feedback_id for (feedback_id,) in db.session.execute(missing)]
+    record_changes(db.session.connection(), feedback_ids, "insert")
+    db.session.commit()
+    return len(feedback_ids)
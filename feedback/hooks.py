@@ -0,0 +1,66 @@
+from collections import Counter
+from extensions import db
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from .models import Feedback
+from .changes import record_changes
+from .rollups import ROLLUP_COLUMNS, apply_rollup_deltas, contribution, stored_contributions
+from .similarity import index_descriptions, remove_from_index
+
+# Session hooks keeping the daily rollups, the change log and the near-duplicate
+# index in step with every feedback row the ORM writes
+
+@event.listens_for(Session, "before_flush")
+def _capture_old_contributions(session, flush_context, instances):
+    """Remember what changed and deleted rows contributed to the rollups before this flush rewrites them."""
+    feedback_ids = [
+        obj.id for obj in list(session.dirty) + list(session.deleted)
+        if isinstance(obj, Feedback) and obj.id is not None
+    ]
+    session.info["rollup_old_contributions"] = stored_contributions(session.connection(), feedback_ids)
+
+@event.listens_for(Session, "after_flush")
+def _update_derived_tables(session, flush_context):
+    """Apply every feedback row inserted, updated or deleted by this flush to the derived tables."""
+    inserted = [obj for obj in session.new if isinstance(obj, Feedback)]
+    changed = [obj for obj in session.dirty if isinstance(obj, Feedback) and obj not in session.deleted]
+    deleted = [obj for obj in session.deleted if isinstance(obj, Feedback)]
+    connection = session.connection()
+
+    # Rollups: the difference between the new and old contributions of each row
+    deltas = Counter()
+    for obj in inserted + changed:
+        deltas.update(contribution(*(getattr(obj, name) for name in ROLLUP_COLUMNS)))
+    deltas.subtract(session.info.pop("rollup_old_contributions", Counter()))
+    apply_rollup_deltas(connection, deltas)
+
+    # Change log
+    record_changes(connection, [obj.id for obj in inserted], "insert")
+    record_changes(connection, [obj.id for obj in changed if session.is_modified(obj)], "update")
+    record_changes(connection, [obj.id for obj in deleted], "delete")
+
+    # Near-duplicate index: new comments and edited descriptions
+    index_descriptions(connection, {
+        obj.id: obj.description for obj in inserted + changed
+        if obj in session.new or inspect(obj).attrs.description.history.has_changes()
+    })
+    remove_from_index(connection, [obj.id for obj in deleted])
+
+def before_bulk_write(query, operation):
+    """Update the derived tables for a bulk ``Query.update()`` or ``Query.delete()``.
+
+    Bulk queries skip the flush hooks above, so routes call this first, inside the
+    same transaction, with ``operation`` set to "update" or "delete". Only updates
+    that leave the dates, status, section, priority and description alone are
+    supported. Returns the ids of the matched rows.
+    """
+    feedback_ids = [feedback_id for (feedback_id,) in query.with_entities(Feedback.id)]
+    connection = db.session.connection()
+
+    if operation == "delete":
+        deltas = Counter()
+        deltas.subtract(stored_contributions(connection, feedback_ids))
+        apply_rollup_deltas(connection, deltas)
+        remove_from_index(connection, feedback_ids)
+    record_changes(connection, feedback_ids, operation)
+    return feedback_ids
@@ -1,17 +1,184 @@
 from datetime import datetime, timezone
 from extensions import db
+from sqlalchemy import case, event, select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.orm import Session
+
+class LookupMixin:
+    """Small dimension table mapping an integer id to a unique name.
+
+    Each lookup class keeps an in-process cache of both directions of the map,
+    so resolving names on reads and writes rarely touches the database. The
+    cache is shared by every thread, so it only ever holds committed rows.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+
+    @classmethod
+    def _cache(cls):
+        # One cache per concrete lookup class: {"by_name": {...}, "by_id": {...}}
+        if "_lookup_cache" not in cls.__dict__:
+            cls._lookup_cache = {"by_name": {}, "by_id": {}}
+        return cls._lookup_cache
+
+    @classmethod
+    def clear_cache(cls):
+        """Forget every cached name/id pair for this lookup table."""
+        cls._lookup_cache = {"by_name": {}, "by_id": {}}
+
+    @classmethod
+    def _pending(cls):
+        # Rows inserted by the current session but not committed yet: {name: id}
+        return db.session.info.setdefault("pending_lookups", {}).setdefault(cls, {})
+
+    @classmethod
+    def _remember(cls, lookup_id, name):
+        if name in cls._pending():
+            return  # Cached once the transaction commits
+        cache = cls._cache()
+        cache["by_name"][name] = lookup_id
+        cache["by_id"][lookup_id] = name
+
+    @classmethod
+    def name_for(cls, lookup_id):
+        """Return the name for an id, or None if the id is None or unknown."""
+        if lookup_id is None:
+            return None
+        cache = cls._cache()
+        if lookup_id not in cache["by_id"]:
+            pending = {pending_id: name for name, pending_id in cls._pending().items()}
+            if lookup_id in pending:
+                return pending[lookup_id]
+            name = db.session.execute(select(cls.name).where(cls.id == lookup_id)).scalar()
+            if name is None:
+                return None
+            cls._remember(lookup_id, name)
+        return cache["by_id"][lookup_id]
+
+    @classmethod
+    def id_for(cls, name, create=True):
+        """Return the id for a name, inserting a new row if ``create`` is set.
+
+        Returns None for a None name, or for an unknown name when ``create`` is False.
+        """
+        if name is None:
+            return None
+        cache = cls._cache()
+        if name in cache["by_name"]:
+            return cache["by_name"][name]
+        if name in cls._pending():
+            return cls._pending()[name]
+
+        lookup_id = db.session.execute(select(cls.id).where(cls.name == name)).scalar()
+        if lookup_id is None:
+            if not create:
+                return None
+            # Insert inside the session's transaction; a concurrent insert of the same name is ignored
+            inserted = db.session.execute(insert(cls).values(name=name).on_conflict_do_nothing(index_elements=["name"]))
+            lookup_id = db.session.execute(select(cls.id).where(cls.name == name)).scalar()
+            if inserted.rowcount:
+                cls._pending()[name] = lookup_id
+                return lookup_id
+        cls._remember(lookup_id, name)
+        return lookup_id
+
+    @classmethod
+    def ids_matching(cls, fragment):
+        """Return the ids of every name containing ``fragment`` (case-insensitive)."""
+        rows = db.session.execute(select(cls.id, cls.name).where(cls.name.ilike(f"%{fragment}%"))).all()
+        for lookup_id, name in rows:
+            cls._remember(lookup_id, name)
+        return [lookup_id for lookup_id, _ in rows]
+
+class Category(LookupMixin, db.Model):
+    __tablename__ = 'category'
+    name = db.Column(db.String(100), nullable=False, unique=True)  # e.g. "Structure, Presentation and Layout"
+
+class Section(LookupMixin, db.Model):
+    __tablename__ = 'section'
+    name = db.Column(db.String(50), nullable=False, unique=True)  # e.g. "Appendix" or "Abstract"
+
+class Priority(LookupMixin, db.Model):
+    __tablename__ = 'priority'
+    name = db.Column(db.String(50), nullable=False, unique=True)  # e.g. "High", "Medium" or "Low"
+
+class Assignee(LookupMixin, db.Model):
+    __tablename__ = 'assignee'
+    name = db.Column(db.String(50), nullable=False, unique=True)
+
+LOOKUP_MODELS = (Category, Section, Priority, Assignee)
+
+def clear_lookup_caches(*args, **kwargs):
+    """Clear the cache of every lookup table."""
+    for model in LOOKUP_MODELS:
+        model.clear_cache()
+
+# Cached ids are only trustworthy while the rows behind them exist, so drop the
+# caches whenever the tables are recreated
+event.listen(db.metadata, "after_create", clear_lookup_caches)
+event.listen(db.metadata, "after_drop", clear_lookup_caches)
+
+@event.listens_for(Session, "after_commit")
+def _cache_committed_lookups(session):
+    """Cache the lookup rows inserted by a transaction once it has committed."""
+    for model, rows in session.info.pop("pending_lookups", {}).items():
+        for name, lookup_id in rows.items():
+            model._remember(lookup_id, name)
+
+@event.listens_for(Session, "after_rollback")
+def _forget_pending_lookups(session):
+    """Drop the lookup rows of a rolled back transaction without ever caching them."""
+    session.info.pop("pending_lookups", None)
+
+def _lookup_hybrid(model, column_name):
+    """Build a hybrid property exposing a foreign key column as the looked-up name."""
+    def getter(self):
+        return model.name_for(getattr(self, column_name))
+
+    def setter(self, value):
+        setattr(self, column_name, model.id_for(value))
+
+    def expression(cls):
+        return select(model.name).where(model.id == getattr(cls, column_name)).scalar_subquery()
+
+    return hybrid_property(getter, setter, expr=expression)
 
 class Feedback(db.Model):
     __tablename__ = 'feedback'
+    # AUTOINCREMENT so ids of comments moved into read-only partitions are never handed out again
+    __table_args__ = {"sqlite_autoincrement": True}
     id = db.Column(db.Integer, primary_key=True)
-    category = db.Column(db.String(100), nullable=False)  # Category could be "Appendix" or "Abstract"
+    category_id = db.Column(db.Integer, db.ForeignKey('category.id'), nullable=False, index=True)
     description = db.Column(db.String(1000), nullable=False)
-    resolved_status = db.Column(db.String(5), nullable=False)  # 'Yes' or 'No'
-    priority_level = db.Column(db.String(50), nullable=True)
-    related_section = db.Column(db.String(50), nullable=True)
+    resolved = db.Column(db.Boolean, nullable=False, default=False)
+    priority_level_id = db.Column(db.Integer, db.ForeignKey('priority.id'), nullable=True, index=True)
+    related_section_id = db.Column(db.Integer, db.ForeignKey('section.id'), nullable=True, index=True)
     created_date = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
     last_updated_date = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
-    assigned_to = db.Column(db.String(50), nullable=True)
+    assigned_to_id = db.Column(db.Integer, db.ForeignKey('assignee.id'), nullable=True, index=True)
+    resolved_date = db.Column(db.DateTime, nullable=True)  # When the comment was last marked as resolved
+
+    # Backward compatible string attributes, usable on instances and in queries
+    category = _lookup_hybrid(Category, "category_id")
+    priority_level = _lookup_hybrid(Priority, "priority_level_id")
+    related_section = _lookup_hybrid(Section, "related_section_id")
+    assigned_to = _lookup_hybrid(Assignee, "assigned_to_id")
+
+    @hybrid_property
+    def resolved_status(self):
+        """'Yes' or 'No', mirroring the boolean ``resolved`` flag."""
+        if self.resolved is None:
+            return None
+        return "Yes" if self.resolved else "No"
+
+    @resolved_status.setter
+    def resolved_status(self, value):
+        # Accept booleans and numbers from JSON payloads as well as "Yes"/"No" strings
+        self.resolved = None if value is None else str(value).strip().lower() in ("yes", "true", "1")
+
+    @resolved_status.expression
+    def resolved_status(cls):
+        return case((cls.resolved, "Yes"), else_="No")
 
     def to_dict(self):
         return {
@@ -25,3 +192,48 @@ class Feedback(db.Model):
             "created_date": self.created_date.strftime("%d/%m/%Y"),
             "last_updated_date": self.last_updated_date.strftime("%d/%m/%Y"),
         }
+
+@event.listens_for(Feedback.resolved, "set", active_history=True)
+def _track_resolved_date(target, value, oldvalue, initiator):
+    """Stamp ``resolved_date`` when a comment becomes resolved and clear it when it is reopened."""
+    if value and oldvalue is not True:
+        target.resolved_date = datetime.now(timezone.utc)
+    elif not value:
+        target.resolved_date = None
+
+class FeedbackDailyRollup(db.Model):
+    """Per-day counts of created and resolved comments for each section and priority.
+
+    Section and priority ids of 0 stand for comments without a section or priority.
+    """
+    __tablename__ = 'feedback_daily_rollup'
+    day = db.Column(db.Date, primary_key=True)
+    related_section_id = db.Column(db.Integer, primary_key=True, default=0)
+    priority_level_id = db.Column(db.Integer, primary_key=True, default=0)
+    created_count = db.Column(db.Integer, nullable=False, default=0)
+    resolved_count = db.Column(db.Integer, nullable=False, default=0)
+
+class FeedbackChange(db.Model):
+    """Change log entry for the /changes feed, keeping only the latest change per comment.
+
+    ``seq`` uses AUTOINCREMENT so sequence numbers are never reused, giving sync
+    clients a monotonic cursor even as older entries are replaced.
+    """
+    __tablename__ = 'feedback_change'
+    __table_args__ = {"sqlite_autoincrement": True}
+    seq = db.Column(db.Integer, primary_key=True)
+    feedback_id = db.Column(db.Integer, nullable=False, unique=True)
+    operation = db.Column(db.String(10), nullable=False)  # 'insert', 'update' or 'delete'
+    changed_at = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+
+class FeedbackSimilarityBucket(db.Model):
+    """LSH bucket of a comment's MinHash signature, one row per band.
+
+    Comments sharing any bucket key are candidate near-duplicates.
+    """
+    __tablename__ = 'feedback_similarity_bucket'
+    # Lookups read the ids of a bucket in order straight from this index
+    __table_args__ = (db.Index("ix_feedback_similarity_bucket_key_feedback", "bucket_key", "feedback_id"),)
+    id = db.Column(db.Integer, primary_key=True)
+    bucket_key = db.Column(db.BigInteger, nullable=False)
+    feedback_id = db.Column(db.Integer, nullable=False, index=True)
@@ -0,0 +1,275 @@
+import os
+import re
+import sqlite3
+from flask import current_app
+from extensions import db
+from sqlalchemy import Column, MetaData, Table, create_engine, event, select, union_all
+from sqlalchemy.orm import aliased
+from sqlalchemy.pool import NullPool
+from .models import Feedback
+
+# Complete past years of feedback are moved out of the main database into one
+# SQLite file per year, e.g. feedback_2023.db, attached read-only as schema p2023.
+# SQLite can only attach a few databases per connection, so past PARTITION_MAX_ATTACHED
+# files the oldest are merged into one file per range of years, e.g. feedback_2015-2019.db
+# attached as schema p2015_2019
+PARTITION_FILE = re.compile(r"^feedback_(\d{4})(?:-(\d{4}))?\.db$")
+
+def partition_directory(app):
+    """Return the absolute partition directory of ``app`` (relative paths live in the instance folder)."""
+    return os.path.join(app.instance_path, app.config["PARTITION_DIR"])
+
+def partition_files(directory):
+    """Return ``{(first year, last year): path}`` for every partition file in ``directory``."""
+    if not os.path.isdir(directory):
+        return {}
+    files = {}
+    for name in os.listdir(directory):
+        match = PARTITION_FILE.match(name)
+        if match:
+            first = int(match.group(1))
+            files[(first, int(match.group(2) or first))] = os.path.join(directory, name)
+    return files
+
+def _schema_name(years):
+    first, last = years
+    return f"p{first}" if first == last else f"p{first}_{last}"
+
+def _file_name(years):
+    first, last = years
+    return f"feedback_{first}.db" if first == last else f"feedback_{first}-{last}.db"
+
+def _column_list():
+    return ", ".join(column.name for column in Feedback.__table__.columns)
+
+def register_partitions(app):
+    """Attach the app's partition files to every database connection.
+
+    Files are re-checked each time a connection is checked out, so partitions
+    created while the app is running are picked up without a restart.
+    """
+    directory = partition_directory(app)
+    mmap_size = int(app.config["PARTITION_MMAP_SIZE"])
+    max_attached = int(app.config["PARTITION_MAX_ATTACHED"])
+
+    def sync_partitions(dbapi_connection, connection_record, *args):
+        files = partition_files(directory)
+        limit = max(min(max_attached, dbapi_connection.getlimit(sqlite3.SQLITE_LIMIT_ATTACHED)), 0)
+        ranges = sorted(files)
+        wanted = tuple(ranges[max(len(ranges) - limit, 0):])
+        attached = connection_record.info.get("feedback_partitions", ())
+        if wanted == attached:
+            return
+
+        if len(wanted) < len(files):
+            # Keep serving the newest partitions instead of failing every request on SQLite's limit
+            app.logger.error(
+                "%d partition files in %s but only %d can be attached, the oldest are left out of every "
+                "query. Run partition-feedback to merge them.", len(files), directory, limit
+            )
+
+        cursor = dbapi_connection.cursor()
+        for years in attached:
+            if years not in wanted:
+                cursor.execute(f"DETACH DATABASE {_schema_name(years)}")
+        for years in wanted:
+            if years not in attached:
+                # Old partitions never change, so open them read-only and memory-mapped
+                schema = _schema_name(years)
+                cursor.execute(f"ATTACH DATABASE ? AS {schema}", (f"file:{files[years]}?mode=ro",))
+                cursor.execute(f"PRAGMA {schema}.mmap_size = {mmap_size}")
+
+        # Union view over the main table and every partition, for unbounded queries in raw SQL
+        columns = _column_list()
+        cursor.execute("DROP VIEW IF EXISTS temp.feedback_all")
+        cursor.execute(
+            f"CREATE TEMP VIEW feedback_all AS SELECT {columns} FROM main.feedback"
+            + "".join(f" UNION ALL SELECT {columns} FROM {_schema_name(years)}.feedback" for years in wanted)
+        )
+        cursor.close()
+        connection_record.info["feedback_partitions"] = wanted
+
+    with app.app_context():
+        event.listen(db.engine, "connect", sync_partitions)
+        event.listen(db.engine, "checkout", sync_partitions)
+
+def attached_partitions():
+    """Return the ``(first year, last year)`` of each partition attached to the current session's connection."""
+    return db.session.connection().info.get("feedback_partitions", ())
+
+_partition_tables = {}
+
+def _partition_table(years):
+    """Return a Table for the feedback table of the partition covering ``years``."""
+    if years not in _partition_tables:
+        _partition_tables[years] = Table(
+            "feedback", MetaData(),
+            *(Column(column.name, column.type) for column in Feedback.__table__.columns),
+            schema=_schema_name(years),
+        )
+    return _partition_tables[years]
+
+def partitioned_ids(feedback_ids=None, category_id=None):
+    """Return the sorted ids of the read-only partitioned comments among ``feedback_ids`` or in ``category_id``."""
+    tables = [_partition_table(years) for years in attached_partitions()]
+    if not tables or feedback_ids is not None and not feedback_ids:
+        return []
+
+    queries = []
+    for table in tables:
+        query = select(table.c.id)
+        if feedback_ids is not None:
+            query = query.where(table.c.id.in_(feedback_ids))
+        if category_id is not None:
+            query = query.where(table.c.category_id == category_id)
+        queries.append(query)
+    return sorted(db.session.execute(union_all(*queries)).scalars())
+
+def feedback_source(start=None, end=None):
+    """Return the entity to query feedback from, given an optional created date range.
+
+    Partitions whose years cannot overlap ``start``..``end`` are skipped. Without
+    any matching partition this is the plain ``Feedback`` model, otherwise a
+    ``Feedback`` alias over the union of the main table and those partitions.
+    """
+    partitions = [
+        (first, last) for first, last in attached_partitions()
+        if (start is None or last >= start.year) and (end is None or first <= end.year)
+    ]
+    if not partitions:
+        return Feedback
+
+    columns = Feedback.__table__.columns
+    union = union_all(
+        select(*columns),
+        *(select(*(_partition_table(years).c[column.name] for column in columns)) for years in partitions),
+    ).subquery("feedback_partitioned")
+    return aliased(Feedback, union)
+
+def _ensure_autoincrement(connection, directory):
+    """Make sure SQLite never reuses a feedback id that may already live in a partition.
+
+    Databases created before feedback ids used AUTOINCREMENT get their feedback table
+    rebuilt, and the id sequence is raised past the highest id in every partition.
+    """
+    schema = connection.exec_driver_sql(
+        "SELECT sql FROM main.sqlite_master WHERE type = 'table' AND name = 'feedback'"
+    ).scalar()
+    if "AUTOINCREMENT" not in schema.upper():
+        existing = [row[1] for row in connection.exec_driver_sql("PRAGMA main.table_info(feedback)")]
+        columns = ", ".join(column.name for column in Feedback.__table__.columns if column.name in existing)
+        indexes = connection.exec_driver_sql(
+            "SELECT name FROM main.sqlite_master WHERE type = 'index' AND tbl_name = 'feedback' AND sql IS NOT NULL"
+        ).scalars().all()
+        for name in indexes:
+            connection.exec_driver_sql(f"DROP INDEX main.{name}")
+        connection.exec_driver_sql("ALTER TABLE main.feedback RENAME TO feedback_rebuild")
+        Feedback.__table__.create(connection)
+        connection.exec_driver_sql(f"INSERT INTO main.feedback ({columns}) SELECT {columns} FROM main.feedback_rebuild")
+        connection.exec_driver_sql("DROP TABLE main.feedback_rebuild")
+
+    highest = connection.exec_driver_sql("SELECT COALESCE(MAX(id), 0) FROM main.feedback").scalar()
+    for path in partition_files(directory).values():
+        connection.exec_driver_sql("ATTACH DATABASE ? AS source", (f"file:{path}?mode=ro",))
+        try:
+            highest = max(highest, connection.exec_driver_sql("SELECT COALESCE(MAX(id), 0) FROM source.feedback").scalar())
+        finally:
+            connection.exec_driver_sql("DETACH DATABASE source")
+
+    sequence = connection.exec_driver_sql("SELECT seq FROM main.sqlite_sequence WHERE name = 'feedback'").scalar()
+    if sequence is None:
+        connection.exec_driver_sql("INSERT INTO main.sqlite_sequence (name, seq) VALUES ('feedback', ?)", (highest,))
+    elif sequence < highest:
+        connection.exec_driver_sql("UPDATE main.sqlite_sequence SET seq = ? WHERE name = 'feedback'", (highest,))
+    connection.commit()
+
+def _create_partition_table(connection):
+    """Create the feedback table of the partition attached as ``target``, if missing."""
+    definition = ", ".join(
+        f"{column.name} {column.type.compile(connection.dialect)}{' PRIMARY KEY' if column.primary_key else ''}"
+        for column in Feedback.__table__.columns
+    )
+    connection.exec_driver_sql(f"CREATE TABLE IF NOT EXISTS target.feedback ({definition})")
+    connection.exec_driver_sql("CREATE INDEX IF NOT EXISTS target.ix_feedback_created_date ON feedback (created_date)")
+
+def _merge_oldest_partitions(connection, directory, keep):
+    """Merge the oldest partition files into one so at most ``keep`` files remain."""
+    files = partition_files(directory)
+    if len(files) <= keep:
+        return
+    oldest = sorted(files)[:len(files) - keep + 1]
+    path = os.path.join(directory, _file_name((oldest[0][0], oldest[-1][1])))
+
+    # Build the merged file under a name the app ignores, then swap it in for the old files
+    building = f"{path}.building"
+    if os.path.exists(building):
+        os.remove(building)
+    columns = _column_list()
+    connection.exec_driver_sql("ATTACH DATABASE ? AS target", (building,))
+    try:
+        _create_partition_table(connection)
+        for years in oldest:
+            connection.exec_driver_sql("ATTACH DATABASE ? AS source", (f"file:{files[years]}?mode=ro",))
+            try:
+                connection.exec_driver_sql(f"INSERT INTO target.feedback ({columns}) SELECT {columns} FROM source.feedback")
+                connection.commit()
+            finally:
+                connection.exec_driver_sql("DETACH DATABASE source")
+    finally:
+        connection.exec_driver_sql("DETACH DATABASE target")
+
+    os.replace(building, path)
+    for years in oldest:
+        os.remove(files[years])
+
+def partition_feedback(before_year):
+    """Move every comment created before ``before_year`` into its year's partition file.
+
+    Returns ``{year: number of comments moved}``. Partitioned comments become read-only:
+    they stay visible to the dashboard, search and statistics but can no longer be edited.
+    Once there are more than ``PARTITION_MAX_ATTACHED`` partition files, the oldest are
+    merged into a single file covering their years.
+    """
+    directory = partition_directory(current_app)
+    os.makedirs(directory, exist_ok=True)
+    db.session.close()
+
+    # A separate connection without the read-only attachments of the app's engine
+    engine = create_engine(db.engine.url, poolclass=NullPool)
+    columns = _column_list()
+
+    moved = {}
+    with engine.connect() as connection:
+        _ensure_autoincrement(connection, directory)
+        years = connection.exec_driver_sql(
+            "SELECT DISTINCT CAST(strftime('%Y', created_date) AS INTEGER) FROM feedback "
+            "WHERE created_date < ?", (f"{before_year:04d}-01-01",)
+        ).scalars().all()
+
+        for year in sorted(years):
+            # A year already merged into a range of years goes into that range's file
+            path = next(
+                (path for (first, last), path in partition_files(directory).items() if first <= year <= last),
+                os.path.join(directory, _file_name((year, year))),
+            )
+            connection.exec_driver_sql("ATTACH DATABASE ? AS target", (path,))
+            try:
+                _create_partition_table(connection)
+
+                in_year = "created_date >= ? AND created_date < ?"
+                bounds = (f"{year:04d}-01-01", f"{year + 1:04d}-01-01")
+                result = connection.exec_driver_sql(
+                    f"INSERT INTO target.feedback ({columns}) SELECT {columns} FROM main.feedback WHERE {in_year}", bounds
+                )
+                moved[year] = result.rowcount
+
+                # Partitioned comments keep their near-duplicate index entries in the main database
+                connection.exec_driver_sql(f"DELETE FROM main.feedback WHERE {in_year}", bounds)
+                connection.commit()
+            finally:
+                connection.exec_driver_sql("DETACH DATABASE target")
+
+        _merge_oldest_partitions(connection, directory, max(int(current_app.config["PARTITION_MAX_ATTACHED"]), 1))
+
+    engine.dispose()
+    return moved
@@ -0,0 +1,89 @@
+from collections import Counter
+from datetime import timedelta
+from extensions import db
+from sqlalchemy import func, inspect, select, text
+from sqlalchemy.dialects.sqlite import insert
+from .models import Feedback, FeedbackDailyRollup
+from .partitions import attached_partitions
+
+# Columns of a feedback row that decide which rollup rows it is counted in
+ROLLUP_COLUMNS = ("created_date", "resolved_date", "resolved", "related_section_id", "priority_level_id")
+
+def contribution(created_date, resolved_date, resolved, related_section_id, priority_level_id):
+    """Return the rollup counts a single feedback row contributes, keyed by (day, section id, priority id)."""
+    counts = Counter()
+    dimensions = (related_section_id or 0, priority_level_id or 0)
+    if created_date is not None:
+        counts[(created_date.date(), *dimensions, "created_count")] += 1
+    if resolved and resolved_date is not None:
+        counts[(resolved_date.date(), *dimensions, "resolved_count")] += 1
+    return counts
+
+def apply_rollup_deltas(connection, deltas):
+    """Add the given count deltas to the rollup table with one upsert per touched row."""
+    rows = {}
+    for (day, section_id, priority_id, column), delta in deltas.items():
+        if delta:
+            row = rows.setdefault((day, section_id, priority_id), {"created_count": 0, "resolved_count": 0})
+            row[column] += delta
+    if not rows:
+        return
+
+    table = FeedbackDailyRollup.__table__
+    statement = insert(table)
+    statement = statement.on_conflict_do_update(
+        index_elements=[table.c.day, table.c.related_section_id, table.c.priority_level_id],
+        set_={
+            "created_count": table.c.created_count + statement.excluded.created_count,
+            "resolved_count": table.c.resolved_count + statement.excluded.resolved_count,
+        },
+    )
+    connection.execute(statement, [
+        {"day": day, "related_section_id": section_id, "priority_level_id": priority_id, **counts}
+        for (day, section_id, priority_id), counts in rows.items()
+    ])
+
+def stored_contributions(connection, feedback_ids):
+    """Return the combined rollup contribution of the given feedback rows as currently stored."""
+    counts = Counter()
+    if feedback_ids:
+        columns = [getattr(Feedback, name) for name in ROLLUP_COLUMNS]
+        for row in connection.execute(select(*columns).where(Feedback.id.in_(feedback_ids))):
+            counts.update(contribution(*row))
+    return counts
+
+def backfill_daily_rollups():
+    """Rebuild the rollup table from the full feedback history and return the number of rollup rows."""
+    connection = db.session.connection()
+
+    # Databases created before resolved_date existed need the column added
+    if "resolved_date" not in {column["name"] for column in inspect(connection).get_columns("feedback")}:
+        connection.execute(text("ALTER TABLE feedback ADD COLUMN resolved_date DATETIME"))
+    FeedbackDailyRollup.__table__.create(connection, checkfirst=True)
+
+    # Resolved comments without a resolution time are assumed resolved when last updated
+    connection.execute(text(
+        "UPDATE feedback SET resolved_date = last_updated_date WHERE resolved AND resolved_date IS NULL"
+    ))
+
+    # Read partitioned years through the union view as well
+    source = "feedback_all" if attached_partitions() else "feedback"
+
+    connection.execute(FeedbackDailyRollup.__table__.delete())
+    connection.execute(text(
+        "INSERT INTO feedback_daily_rollup (day, related_section_id, priority_level_id, created_count, resolved_count) "
+        "SELECT day, section_id, priority_id, SUM(created), SUM(resolved) FROM ("
+        "  SELECT date(created_date) AS day, COALESCE(related_section_id, 0) AS section_id, "
+        "  COALESCE(priority_level_id, 0) AS priority_id, 1 AS created, 0 AS resolved "
+        f"  FROM {source} WHERE created_date IS NOT NULL "
+        "  UNION ALL "
+        "  SELECT date(resolved_date), COALESCE(related_section_id, 0), COALESCE(priority_level_id, 0), 0, 1 "
+        f"  FROM {source} WHERE resolved AND resolved_date IS NOT NULL"
+        ") GROUP BY day, section_id, priority_id"
+    ))
+    db.session.commit()
+    return db.session.query(func.count()).select_from(FeedbackDailyRollup).scalar()
+
+def week_start(day):
+    """Return the Monday of the week containing ``day``."""
+    return day - timedelta(days=day.weekday())
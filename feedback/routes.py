@@ -1,14 +1,40 @@
-from flask import Blueprint, render_template, request, redirect, url_for, jsonify, flash
+from flask import Blueprint, render_template, request, redirect, url_for, jsonify, flash, current_app, abort
 from extensions import db
-from .models import Feedback
-from datetime import datetime, timezone
+from .models import Feedback, FeedbackChange, FeedbackDailyRollup, Category, Section, Priority
+from .admission import admission_controlled
+from .hooks import before_bulk_write
+from .rollups import week_start
+from .similarity import MIN_THRESHOLD, find_similar, find_similar_batch
+from .partitions import feedback_source, partitioned_ids
+from datetime import datetime, timedelta, timezone
 from sqlalchemy import func  # Import func to handle length operations
 import json
 import csv
+import math
+import time
 
 # Initialise the Blueprint
 feedback_bp = Blueprint('feedback', __name__, template_folder='../templates')
 
+def parse_created_range(args):
+    """Parse the optional 'start' and 'end' (YYYY-MM-DD) created date query parameters.
+
+    Raises ValueError for a malformed date.
+    """
+    start = args.get("start", "").strip()
+    end = args.get("end", "").strip()
+    start = datetime.strptime(start, "%Y-%m-%d").date() if start else None
+    end = datetime.strptime(end, "%Y-%m-%d").date() if end else None
+    return start, end
+
+def filter_created_range(query, source, start, end):
+    """Restrict a query on ``source`` to comments created between ``start`` and ``end`` inclusive."""
+    if start:
+        query = query.filter(source.created_date >= datetime.combine(start, datetime.min.time()))
+    if end:
+        query = query.filter(source.created_date < datetime.combine(end + timedelta(days=1), datetime.min.time()))
+    return query
+
 @feedback_bp.route("/add", methods=["GET", "POST"])
 def add_feedback():
     """Route to add a new feedback comment using a form submission."""
@@ -20,6 +46,9 @@ def add_feedback():
         related_section = request.form.get("related_section")
         assigned_to = request.form.get("assigned_to")
 
+        # Look for existing comments that are near-duplicates of this one
+        similar = find_similar(description, current_app.config["NEAR_DUPLICATE_THRESHOLD"]) if description else []
+
         # Create a new Feedback instance
         new_feedback = Feedback(
             category=category,
@@ -33,9 +62,12 @@ def add_feedback():
         db.session.commit()
 
         flash("Comment added successfully!", "success") # Flash a success message
+        if similar:
+            similar_ids = ", ".join(f"#{similar_id}" for similar_id, _ in similar)
+            flash(f"This comment looks very similar to existing comment(s) {similar_ids}.", "warning")
 
         # After adding the new feedback, calculate the last page
-        total_comments = Feedback.query.count()
+        total_comments = db.session.query(feedback_source()).count()
         comments_per_page = 5
         last_page = (total_comments // comments_per_page) + (1 if total_comments % comments_per_page else 0)
 
@@ -47,9 +79,21 @@ def add_feedback():
 @feedback_bp.route("/counts")
 def counts():
     """Route to display feedback counts for each related section."""
-    appendix_count = Feedback.query.filter(Feedback.related_section.ilike("%Appendix%")).count()
-    abstract_count = Feedback.query.filter(Feedback.related_section.ilike("%Abstract%")).count()
-    executive_summary_count = Feedback.query.filter(Feedback.related_section.ilike("%Executive Summary%")).count()
+    # A single GROUP BY over the integer section ids, then match the names in Python
+    source = feedback_source()
+    section_counts = (
+        db.session.query(source.related_section_id, func.count(source.id))
+        .group_by(source.related_section_id)
+        .all()
+    )
+    counts_by_name = {Section.name_for(section_id): count for section_id, count in section_counts if section_id is not None}
+
+    def count_matching(fragment):
+        return sum(count for name, count in counts_by_name.items() if fragment.lower() in name.lower())
+
+    appendix_count = count_matching("Appendix")
+    abstract_count = count_matching("Abstract")
+    executive_summary_count = count_matching("Executive Summary")
 
     return render_template(
         "counts.html",
@@ -66,24 +110,30 @@ def view_feedback():
     sort_order = request.args.get("sort", "asc").lower()  # Default to "asc" for ascending order and ensure lowercase
     page = request.args.get("page", 1, type=int)  # Get the page number, default to 1
     edited_feedback_id = request.args.get("edited_feedback_id", None)  # Get the edited feedback ID if present
+    try:
+        start, end = parse_created_range(request.args)  # Optional created date range
+    except ValueError:
+        return jsonify({"error": "Invalid date format. Use YYYY-MM-DD for start and end"}), 400
 
-    # Start with a base query for all feedback
-    query = Feedback.query
+    # Start with a base query for all feedback, only reading the partitions the date range can touch
+    source = feedback_source(start, end)
+    query = filter_created_range(db.session.query(source), source, start, end)
 
-    # Apply related section filter
-    query = query.filter(Feedback.related_section.ilike(f"%{related_section_filter}%"))  # Case-insensitive filter
+    # Apply related section filter (case-insensitive match on the section names, then filter on their ids)
+    query = query.filter(source.related_section_id.in_(Section.ids_matching(related_section_filter)))
 
     # Apply sorting based on sort_order parameter
     if sort_order == "asc":
-        query = query.order_by(Feedback.created_date.asc())  # Order by created_date in ascending order
+        query = query.order_by(source.created_date.asc())  # Order by created_date in ascending order
     elif sort_order == "desc":
-        query = query.order_by(Feedback.created_date.desc())  # Order by created_date in descending order
+        query = query.order_by(source.created_date.desc())  # Order by created_date in descending order
     else:
         # Fallback to ascending order by ID if sort_order is invalid
-        query = query.order_by(Feedback.created_date.asc())
+        query = query.order_by(source.created_date.asc())
 
     # Paginate the results
     feedbacks = query.paginate(page=page, per_page=5)  # Adjust per_page to control the number of items per page
+    read_only_ids = set(partitioned_ids([feedback.id for feedback in feedbacks.items]))  # Partitioned comments can't be edited
 
    # Pass the feedback, filter, sorting, and counts parameters to the template
     return render_template(
@@ -91,13 +141,22 @@ def view_feedback():
         feedbacks=feedbacks,
         related_section_filter=related_section_filter,
         sort_order=sort_order,
-        edited_feedback_id=edited_feedback_id
+        start=start.strftime("%Y-%m-%d") if start else "",
+        end=end.strftime("%Y-%m-%d") if end else "",
+        edited_feedback_id=edited_feedback_id,
+        read_only_ids=read_only_ids
     )
 
+def get_writable_feedback_or_404(feedback_id):
+    """Return the feedback comment with ``feedback_id``, aborting with 409 if it is in a read-only partition."""
+    if db.session.get(Feedback, feedback_id) is None and partitioned_ids([feedback_id]):
+        abort(409, description="This comment is in a read-only partition and can no longer be edited or deleted.")
+    return Feedback.query.get_or_404(feedback_id)
+
 @feedback_bp.route("/edit/<int:feedback_id>", methods=["GET", "POST"])
 def edit_feedback(feedback_id):
     """Route to edit an existing feedback comment."""
-    feedback = Feedback.query.get_or_404(feedback_id)
+    feedback = get_writable_feedback_or_404(feedback_id)
     page = request.args.get("page", 1, type=int)  # Capture the current page number
 
     if request.method == "POST":
@@ -117,31 +176,50 @@ def edit_feedback(feedback_id):
 @feedback_bp.route("/delete/<int:feedback_id>", methods=["POST"])
 def delete_feedback(feedback_id):
     """Route to delete a feedback comment by ID."""
-    feedback = Feedback.query.get_or_404(feedback_id)
+    feedback = get_writable_feedback_or_404(feedback_id)
     db.session.delete(feedback)
     db.session.commit()
     flash("Comment successfully deleted.", "success")  # Flashing a success message
     return redirect(url_for("feedback.view_feedback"))
 
 @feedback_bp.route("/bulk-upload", methods=["POST"])
+@admission_controlled
 def bulk_upload_feedback():
     """Route to bulk upload multiple feedback comments using JSON data in a single request."""
     # Get the list of feedbacks from the request JSON body
     feedback_data = request.json.get("feedbacks", [])
 
+    # How to handle near-duplicates: "flag" adds them and reports them, "skip" leaves them out of the upload
+    on_duplicate = request.json.get("on_duplicate", "flag")
+
     # Check if feedbacks are provided
     if not feedback_data:
         return jsonify({"error": "No feedback entries provided in the request body."}), 400
+    if on_duplicate not in ("flag", "skip"):
+        return jsonify({"error": "Invalid on_duplicate value. Use 'flag' or 'skip'."}), 400
+    if len(feedback_data) > current_app.config["BULK_MAX_ITEMS"]:
+        return jsonify({"error": f"Too many feedback entries. The limit is {current_app.config['BULK_MAX_ITEMS']} per request."}), 413
 
-    # Loop over each feedback entry in the list
+    # Validate required fields of every entry before adding any
+    required_fields = ["category", "description", "resolved_status", "priority_level", "related_section", "assigned_to"]
     for feedback_entry in feedback_data:
-        # Validate required fields
-        required_fields = ["category", "description", "resolved_status", "priority_level", "related_section", "assigned_to"]
         for field in required_fields:
             if field not in feedback_entry or feedback_entry[field] is None:
                 return jsonify({"error": "Validation failed. Please ensure all required fields are provided for each feedback entry."}), 400
 
-        new_feedback = Feedback(
+    # Look up near-duplicates of the whole upload at once, among stored comments and earlier entries
+    similar = find_similar_batch(
+        [feedback_entry.get("description") for feedback_entry in feedback_data],
+        current_app.config["NEAR_DUPLICATE_THRESHOLD"],
+        skip_duplicates=on_duplicate == "skip",
+    )
+
+    # Loop over each feedback entry in the list
+    new_feedbacks = {}
+    for index, feedback_entry in enumerate(feedback_data):
+        if similar[index] and on_duplicate == "skip":
+            continue
+        new_feedbacks[index] = Feedback(
             category=feedback_entry.get("category"),
             description=feedback_entry.get("description"),
             resolved_status=feedback_entry.get("resolved_status"),
@@ -150,21 +228,35 @@ def bulk_upload_feedback():
             assigned_to=feedback_entry.get("assigned_to"),
             created_date=datetime.now(timezone.utc)
         )
-        # Add the new feedback entry to the database session
-        db.session.add(new_feedback)
+
+    # Add every new feedback entry in a single flush, which also gives earlier entries their ids
+    db.session.add_all(new_feedbacks.values())
+    db.session.flush()
+    duplicates = [
+        {"index": index, "similar_to": [
+            new_feedbacks[other].id if feedback_id is None else feedback_id for feedback_id, other, _ in matches
+        ]}
+        for index, matches in enumerate(similar) if matches
+    ]
 
     # Commit the changes to save all new feedback comments
     db.session.commit()
 
-    return jsonify({"message": "Feedback comments uploaded successfully"}), 201
+    return jsonify({"message": "Feedback comments uploaded successfully", "duplicates": duplicates}), 201
 
 @feedback_bp.route("/search", methods=["GET"])
 def get_feedback_by_phrase():
     """Route to retrieve feedback comments containing a specific phrase in the description."""
     phrase = request.args.get("phrase", "").strip()  # Extract the value of the 'phrase' query parameter
+    try:
+        start, end = parse_created_range(request.args)  # Optional created date range
+    except ValueError:
+        return jsonify({"error": "Invalid date format. Use YYYY-MM-DD for start and end"}), 400
 
-    # If a phrase is provided, filter the feedback entries
-    feedbacks = Feedback.query.filter(Feedback.description.ilike(f"%{phrase}%")).all()
+    # If a phrase is provided, filter the feedback entries, only reading the partitions the date range can touch
+    source = feedback_source(start, end)
+    query = filter_created_range(db.session.query(source), source, start, end)
+    feedbacks = query.filter(source.description.ilike(f"%{phrase}%")).all()
 
     # Check if feedbacks are found
     if not feedbacks:
@@ -185,11 +277,12 @@ def get_feedback_by_max_length():
         return jsonify({"error": "Invalid max length value. Please provide a valid integer."}), 400
 
     # Start with the base query for all feedback
-    query = Feedback.query
+    source = feedback_source()
+    query = db.session.query(source)
 
     # Apply filtering for maximum length
     if max_length is not None:
-        query = query.filter(func.length(Feedback.description) <= max_length)
+        query = query.filter(func.length(source.description) <= max_length)
 
     # Execute the query to get filtered feedback comments
     feedbacks = query.all()
@@ -202,6 +295,7 @@ def get_feedback_by_max_length():
     return jsonify([feedback.to_dict() for feedback in feedbacks])
 
 @feedback_bp.route("/update-category", methods=["PUT", "PATCH"])
+@admission_controlled
 def update_multiple_feedback_categories():
     """Route to batch update the category of multiple feedback comments."""
     # Retrieve the list of feedback IDs and the new category from the request JSON body
@@ -211,17 +305,27 @@ def update_multiple_feedback_categories():
     # Validate input
     if not feedback_ids or not new_category:
         return jsonify({"error": "Please provide both feedback IDs and a new category."}), 400
+    if len(feedback_ids) > current_app.config["BULK_MAX_ITEMS"]:
+        return jsonify({"error": f"Too many feedback IDs. The limit is {current_app.config['BULK_MAX_ITEMS']} per request."}), 413
 
-    # Update the category for the specified feedback comments
+    # Update the category for the specified feedback comments, skipping those in read-only partitions
     try:
-        Feedback.query.filter(Feedback.id.in_(feedback_ids)).update({"category": new_category}, synchronize_session=False)
+        new_category_id = Category.id_for(new_category)
+        read_only_ids = partitioned_ids(feedback_ids)
+        query = Feedback.query.filter(Feedback.id.in_(feedback_ids))
+        before_bulk_write(query, "update")
+        query.update({"category_id": new_category_id}, synchronize_session=False)
         db.session.commit()
     except Exception as e:
         return jsonify({"error": f"Failed to update feedback comments: {str(e)}"}), 500
 
+    if read_only_ids:
+        return jsonify({"message": "Feedback comments updated, except those in read-only partitions.",
+                        "read_only_ids": read_only_ids}), 200
     return jsonify({"message": "Feedback comments updated successfully."}), 200
 
 @feedback_bp.route("/delete-by-category", methods=["DELETE"])
+@admission_controlled
 def delete_feedback_by_category():
     """Route to delete all feedback comments of a specified category."""
     # Retrieve the category parameter from the query string
@@ -231,13 +335,22 @@ def delete_feedback_by_category():
     if not category:
         return jsonify({"error": "Please provide a category to delete."}), 400
 
-    # Delete all feedback comments of the specified category
+    # Delete all feedback comments of the specified category, skipping those in read-only partitions
+    read_only_ids = []
     try:
-        Feedback.query.filter_by(category=category).delete()
+        category_id = Category.id_for(category, create=False)
+        if category_id is not None:
+            read_only_ids = partitioned_ids(category_id=category_id)
+            query = Feedback.query.filter_by(category_id=category_id)
+            before_bulk_write(query, "delete")
+            query.delete()
         db.session.commit()
     except Exception as e:
         return jsonify({"error": f"Failed to delete feedback comments: {str(e)}"}), 500
 
+    if read_only_ids:
+        return jsonify({"message": f"Feedback comments in category '{category}' deleted, except those in read-only partitions.",
+                        "read_only_ids": read_only_ids}), 200
     return jsonify({"message": f"All feedback comments in category '{category}' deleted successfully."}), 200
 
 @feedback_bp.route("/summary-statistics", methods=["GET"])
@@ -245,7 +358,8 @@ def get_average_comment_length():
     """Route to get the average length of feedback comments."""
     try:
         # Calculate average length of comments
-        avg_length = db.session.query(db.func.avg(db.func.length(Feedback.description))).scalar()
+        source = feedback_source()
+        avg_length = db.session.query(db.func.avg(db.func.length(source.description))).scalar()
 
         # Construct the summary
         summary = {
@@ -256,7 +370,147 @@ def get_average_comment_length():
     except Exception as e:
         return jsonify({"error": f"Failed to retrieve average comment length: {str(e)}"}), 500
 
+@feedback_bp.route("/trends", methods=["GET"])
+def get_feedback_trends():
+    """Route to get created versus resolved counts per day or week, read from the daily rollups."""
+    granularity = request.args.get("granularity", "day").lower()  # "day" or "week"
+    group_by = request.args.get("group_by", "").lower()  # "", "section" or "priority"
+
+    if granularity not in ("day", "week"):
+        return jsonify({"error": "Invalid granularity. Use 'day' or 'week'."}), 400
+    group_columns = {"": None, "section": FeedbackDailyRollup.related_section_id, "priority": FeedbackDailyRollup.priority_level_id}
+    if group_by not in group_columns:
+        return jsonify({"error": "Invalid group_by value. Use 'section' or 'priority'."}), 400
+
+    # Validate the optional date range
+    try:
+        start, end = parse_created_range(request.args)
+    except ValueError:
+        return jsonify({"error": "Invalid date format. Use YYYY-MM-DD for start and end"}), 400
+
+    # Weekly trends cover whole weeks, so widen the range to the Monday before start and the Sunday after end
+    if granularity == "week" and start:
+        start = week_start(start)
+    if granularity == "week" and end:
+        end = week_start(end) + timedelta(days=6)
+
+    # Sum the rollup rows per day (and group), only reading the requested range
+    group_column = group_columns[group_by]
+    columns = [FeedbackDailyRollup.day]
+    if group_column is not None:
+        columns.append(group_column)
+    query = db.session.query(
+        *columns,
+        func.sum(FeedbackDailyRollup.created_count),
+        func.sum(FeedbackDailyRollup.resolved_count),
+    )
+    if start:
+        query = query.filter(FeedbackDailyRollup.day >= start)
+    if end:
+        query = query.filter(FeedbackDailyRollup.day <= end)
+    rows = query.group_by(*columns).order_by(*columns).all()
+
+    # Fold the days into the requested buckets
+    buckets = {}
+    for row in rows:
+        day, group_id, created, resolved = row if group_column is not None else (row[0], None, *row[1:])
+        period = week_start(day) if granularity == "week" else day
+        bucket = buckets.setdefault((period, group_id), {"created": 0, "resolved": 0})
+        bucket["created"] += created
+        bucket["resolved"] += resolved
+
+    lookup = {"section": ("related_section", Section), "priority": ("priority_level", Priority)}.get(group_by)
+    trends = []
+    for (period, group_id), counts in sorted(buckets.items(), key=lambda item: (item[0][0], item[0][1] or 0)):
+        if not counts["created"] and not counts["resolved"]:
+            continue
+        entry = {"period": period.strftime("%Y-%m-%d")}
+        if lookup:
+            entry[lookup[0]] = lookup[1].name_for(group_id or None)
+        entry.update(counts)
+        trends.append(entry)
+
+    return jsonify({"granularity": granularity, "group_by": group_by or None, "trends": trends}), 200
+
+@feedback_bp.route("/<int:feedback_id>/similar", methods=["GET"])
+def get_similar_feedback(feedback_id):
+    """Route to retrieve the near-duplicates of a feedback comment."""
+    source = feedback_source()  # Partitioned comments are read-only but still have near-duplicates
+    feedback = db.session.query(source).filter(source.id == feedback_id).first_or_404()
+
+    # Validate the optional similarity threshold
+    try:
+        threshold = float(request.args.get("threshold", current_app.config["NEAR_DUPLICATE_THRESHOLD"]))
+    except ValueError:
+        return jsonify({"error": f"Invalid threshold. Please provide a number between {MIN_THRESHOLD} and 1."}), 400
+    if not MIN_THRESHOLD <= threshold <= 1:
+        return jsonify({"error": f"Invalid threshold. Please provide a number between {MIN_THRESHOLD} and 1."}), 400
+
+    similar = find_similar(feedback.description, threshold, exclude_id=feedback.id)
+    matches = {match.id: match for match in db.session.query(source).filter(source.id.in_([similar_id for similar_id, _ in similar]))}
+    return jsonify([
+        {**matches[similar_id].to_dict(), "similarity": round(similarity, 3)} for similar_id, similarity in similar
+    ]), 200
+
+@feedback_bp.route("/changes", methods=["GET"])
+def get_feedback_changes():
+    """Route to get feedback comments changed since a cursor, for clients mirroring the data."""
+    # Validate the cursor, batch size and optional long-poll wait (in seconds)
+    try:
+        since = int(request.args.get("since", 0))
+        limit = int(request.args.get("limit", 100))
+        wait = float(request.args.get("wait", 0))
+    except ValueError:
+        return jsonify({"error": "Invalid parameters. 'since' and 'limit' must be integers and 'wait' a number."}), 400
+    if since < 0 or limit < 1:
+        return jsonify({"error": "Invalid parameters. 'since' must be at least 0 and 'limit' at least 1."}), 400
+    if not math.isfinite(wait):
+        return jsonify({"error": "Invalid parameters. 'wait' must be a finite number of seconds."}), 400
+    limit = min(limit, 1000)  # Bound the batch size
+    wait = min(max(wait, 0), 30)  # Bound the long-poll wait
+
+    # Fetch one extra entry to know whether more changes are waiting
+    deadline = time.monotonic() + wait
+    while True:
+        entries = (
+            FeedbackChange.query.filter(FeedbackChange.seq > since)
+            .order_by(FeedbackChange.seq)
+            .limit(limit + 1)
+            .all()
+        )
+        if entries or time.monotonic() >= deadline:
+            break
+        db.session.commit()  # End the read transaction so the next poll sees new commits
+        time.sleep(min(0.5, max(deadline - time.monotonic(), 0)))
+
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+
+    # Load the current state of every comment that was not deleted in one query
+    live_ids = [entry.feedback_id for entry in entries if entry.operation != "delete"]
+    source = feedback_source()
+    feedbacks = {feedback.id: feedback for feedback in db.session.query(source).filter(source.id.in_(live_ids))} if live_ids else {}
+
+    changes = []
+    for entry in entries:
+        feedback = feedbacks.get(entry.feedback_id)
+        changes.append({
+            "seq": entry.seq,
+            "id": entry.feedback_id,
+            "operation": entry.operation,
+            "changed_at": entry.changed_at.strftime("%Y-%m-%dT%H:%M:%S"),
+            # Deleted comments are returned as tombstones without data
+            "feedback": feedback.to_dict() if feedback and entry.operation != "delete" else None,
+        })
+
+    return jsonify({
+        "changes": changes,
+        "next_cursor": entries[-1].seq if entries else since,
+        "has_more": has_more,
+    }), 200
+
 @feedback_bp.route("archive", methods=["POST", "PUT"])
+@admission_controlled
 def archive_old_feedback():
     """Route to archive feedback comments older than a specified date."""
     # Get the date from the request body
@@ -270,7 +524,8 @@ def archive_old_feedback():
         return jsonify({"error": "Invalid date format. Use YYYY-MM-DD for the date"}), 400
 
     # Query feedback comments older than the specified date
-    old_feedbacks = Feedback.query.filter(Feedback.last_updated_date < date_threshold).all()
+    source = feedback_source()
+    old_feedbacks = db.session.query(source).filter(source.last_updated_date < date_threshold).all()
     
     if not old_feedbacks:
         return jsonify({"message": "No feedback comments older than the specified date."}), 200
@@ -0,0 +1,204 @@
+import hashlib
+import struct
+import zlib
+from collections import Counter, defaultdict
+from extensions import db
+from sqlalchemy import bindparam, func, insert, select, union_all
+from .models import FeedbackSimilarityBucket
+from .partitions import feedback_source
+
+# Character n-gram MinHash with LSH banding. With 8 bands of 4 rows, two comments with
+# similarity s share a bucket with probability 1 - (1 - s**4)**8: ~98% at 0.8, ~67% at
+# 0.6, ~40% at 0.5 and ~19% at 0.4. Lower thresholds would mostly miss their matches,
+# so MIN_THRESHOLD is the lowest threshold lookups accept
+SHINGLE_SIZE = 5
+SIGNATURE_SIZE = 32
+BANDS = 8
+ROWS_PER_BAND = SIGNATURE_SIZE // BANDS
+MIN_THRESHOLD = 0.6
+
+# A lookup reads at most this many comments per bucket and per requested match, and compares
+# only as many of those exactly, the ones sharing the most buckets first. A comment stored
+# thousands of times then costs no more to match than a unique one
+CANDIDATES_PER_MATCH = 2
+
+# Batch lookups send bucket keys and ids in chunks, below SQLite's limit on bound parameters
+CHUNK_SIZE = 500
+
+def shingles(text):
+    """Return the set of character n-grams of ``text``, ignoring case and repeated whitespace."""
+    text = " ".join(("" if text is None else str(text)).lower().split())
+    if len(text) <= SHINGLE_SIZE:
+        return {text}
+    return {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+def jaccard(a, b):
+    """Return the Jaccard similarity of two shingle sets."""
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+def bucket_keys(shingle_set):
+    """Return one LSH bucket key per band for the MinHash signature of ``shingle_set``."""
+    # One-permutation MinHash: a single hash per shingle, the low bits pick a bin and each
+    # bin keeps its minimum, so the signature costs one pass instead of one per permutation
+    signature = [None] * SIGNATURE_SIZE
+    for shingle in shingle_set:
+        h = zlib.crc32(shingle.encode())
+        position, value = h % SIGNATURE_SIZE, h // SIGNATURE_SIZE
+        if signature[position] is None or value < signature[position]:
+            signature[position] = value
+
+    # Densify: an empty bin borrows the next non-empty bin's value, tagged with the distance
+    bins = list(signature)
+    for position in range(SIGNATURE_SIZE):
+        if bins[position] is None:
+            distance = 1
+            while bins[(position + distance) % SIGNATURE_SIZE] is None:
+                distance += 1
+            signature[position] = bins[(position + distance) % SIGNATURE_SIZE] + (distance << 32)
+
+    keys = []
+    for band in range(BANDS):
+        rows = signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]
+        digest = hashlib.blake2b(struct.pack(f">I{ROWS_PER_BAND}Q", band, *rows), digest_size=8).digest()
+        keys.append(int.from_bytes(digest, "big", signed=True))
+    return keys
+
+def _build_candidate_ids():
+    """Return a subquery of the ``candidate_count`` ids sharing the most of the band keys ``key_0`` ...
+
+    Each band reads at most ``candidate_count`` ids, in order, straight from the
+    (bucket_key, feedback_id) index. The statement is built once and only its
+    parameters change between lookups.
+    """
+    bucket = FeedbackSimilarityBucket
+    count = bindparam("candidate_count")
+    per_band = [
+        select(
+            select(bucket.feedback_id)
+            .where(bucket.bucket_key == bindparam(f"key_{band}"), bucket.feedback_id != bindparam("exclude_id"))
+            .order_by(bucket.feedback_id).limit(count).subquery().c.feedback_id
+        )
+        for band in range(BANDS)
+    ]
+    shared = union_all(*per_band).subquery()
+    return (
+        select(shared.c.feedback_id).group_by(shared.c.feedback_id)
+        .order_by(func.count().desc(), shared.c.feedback_id).limit(count).scalar_subquery()
+    )
+
+_candidate_ids = _build_candidate_ids()
+
+def _candidate_params(keys, limit, exclude_id=None):
+    """Return the parameters of ``_candidate_ids`` for the band ``keys`` of one lookup."""
+    params = {f"key_{band}": key for band, key in enumerate(keys)}
+    params["candidate_count"] = limit * CANDIDATES_PER_MATCH
+    params["exclude_id"] = 0 if exclude_id is None else exclude_id  # Ids start at 1
+    return params
+
+def find_similar(description, threshold, exclude_id=None, limit=10):
+    """Return up to ``limit`` (feedback id, similarity) pairs at or above ``threshold``, most similar first."""
+    query_shingles = shingles(description)
+
+    # Candidates are the comments sharing the most buckets, partitioned ones included;
+    # only those are compared exactly
+    source = feedback_source()
+    query = select(source.id, source.description).where(source.id.in_(_candidate_ids))
+    params = _candidate_params(bucket_keys(query_shingles), limit, exclude_id)
+
+    matches = []
+    for feedback_id, candidate in db.session.execute(query, params):
+        similarity = jaccard(query_shingles, shingles(candidate))
+        if similarity >= threshold:
+            matches.append((feedback_id, similarity))
+    matches.sort(key=lambda match: (-match[1], match[0]))
+    return matches[:limit]
+
+def find_similar_batch(descriptions, threshold, skip_duplicates=False, limit=10):
+    """Return the near-duplicates of each of ``descriptions`` among stored comments and the descriptions before it.
+
+    Returns one list per description of up to ``limit`` (feedback id, index, similarity) matches,
+    most similar first. A stored comment has its feedback id and an index of None, an earlier
+    description its index and a feedback id of None. With ``skip_duplicates``, descriptions with
+    a match are not stored, so later descriptions are not matched against them. Stored candidates
+    for the whole batch are read with one query per chunk of bucket keys, and nothing is flushed.
+    """
+    count = limit * CANDIDATES_PER_MATCH
+    shingle_sets = [shingles(description) for description in descriptions]
+    key_lists = [bucket_keys(shingle_set) for shingle_set in shingle_sets]
+
+    # The first ``count`` stored ids of each bucket, as find_similar reads them
+    bucket = FeedbackSimilarityBucket
+    rank = func.row_number().over(partition_by=bucket.bucket_key, order_by=bucket.feedback_id).label("rank")
+    stored = defaultdict(list)
+    for chunk in _chunks(list({key for keys in key_lists for key in keys})):
+        ranked = select(bucket.bucket_key, bucket.feedback_id, rank).where(bucket.bucket_key.in_(chunk)).subquery()
+        for key, feedback_id in db.session.execute(select(ranked.c.bucket_key, ranked.c.feedback_id).where(ranked.c.rank <= count)):
+            stored[key].append(feedback_id)
+
+    stored_candidates = [_top_candidates(keys, stored, count) for keys in key_lists]
+    stored_shingles = {}
+    source = feedback_source()
+    for chunk in _chunks(list({feedback_id for candidates in stored_candidates for feedback_id in candidates})):
+        for feedback_id, description in db.session.execute(select(source.id, source.description).where(source.id.in_(chunk))):
+            stored_shingles[feedback_id] = shingles(description)
+
+    earlier = defaultdict(list)  # The first ``count`` earlier descriptions of each bucket
+    results = []
+    for index, (shingle_set, keys) in enumerate(zip(shingle_sets, key_lists)):
+        matches = []
+        for feedback_id in stored_candidates[index]:
+            similarity = jaccard(shingle_set, stored_shingles.get(feedback_id, set()))
+            if similarity >= threshold:
+                matches.append((feedback_id, None, similarity))
+        for other in _top_candidates(keys, earlier, count):
+            similarity = jaccard(shingle_set, shingle_sets[other])
+            if similarity >= threshold:
+                matches.append((None, other, similarity))
+        # Stored comments come before the earlier descriptions, which get the next ids
+        matches.sort(key=lambda match: (-match[2], match[0] is None, match[1] if match[0] is None else match[0]))
+        results.append(matches[:limit])
+
+        if not (skip_duplicates and matches):
+            for key in set(keys):
+                if len(earlier[key]) < count:
+                    earlier[key].append(index)
+    return results
+
+def _top_candidates(keys, buckets, count):
+    """Return the ``count`` entries of ``buckets`` sharing the most of ``keys``, ties broken by order."""
+    shared = Counter(candidate for key in set(keys) for candidate in buckets.get(key, ()))
+    return sorted(shared, key=lambda candidate: (-shared[candidate], candidate))[:count]
+
+def _chunks(items):
+    for start in range(0, len(items), CHUNK_SIZE):
+        yield items[start:start + CHUNK_SIZE]
+
+def index_descriptions(connection, descriptions):
+    """(Re)index the given ``{feedback_id: description}`` items."""
+    if not descriptions:
+        return
+    remove_from_index(connection, list(descriptions))
+    connection.execute(insert(FeedbackSimilarityBucket), [
+        {"bucket_key": key, "feedback_id": feedback_id}
+        for feedback_id, description in descriptions.items()
+        for key in set(bucket_keys(shingles(description)))
+    ])
+
+def remove_from_index(connection, feedback_ids):
+    """Drop the given comments from the index."""
+    if feedback_ids:
+        connection.execute(FeedbackSimilarityBucket.__table__.delete().where(
+            FeedbackSimilarityBucket.feedback_id.in_(feedback_ids)
+        ))
+
+def rebuild_similarity_index():
+    """Rebuild the index from every stored comment and return the number of comments indexed."""
+    connection = db.session.connection()
+    for index in FeedbackSimilarityBucket.__table__.indexes:  # Indexes added since the table was created
+        index.create(connection, checkfirst=True)
+    connection.execute(FeedbackSimilarityBucket.__table__.delete())
+    source = feedback_source()
+    descriptions = dict(db.session.execute(select(source.id, source.description)).all())
+    index_descriptions(connection, descriptions)
+    db.session.commit()
+    return len(descriptions)
@@ -1,7 +1,7 @@
 import json
 from extensions import db
 from feedback.models import Feedback  # Import Feedback model
-from app import app  # Import Flask app
+from app import create_app  # Import the Flask app factory
 from datetime import datetime, timezone
 
 # Load data from feedback JSON file
@@ -9,7 +9,9 @@ with open('feedback_data.json', mode='r') as json_file:
     feedback_data = json.load(json_file)
 
 # Load data into feedback table in the database
+app = create_app()
 with app.app_context():
+    db.create_all()
     for item in feedback_data:
         # Convert date from string to datetime object
         created_date = datetime.strptime(item['Created Date'], "%d/%m/%Y")
@@ -25,7 +27,8 @@ with app.app_context():
             related_section=item['Related Section'],
             created_date=created_date,  
             last_updated_date=last_updated_date,  
-            assigned_to=item['Assigned To']
+            assigned_to=item['Assigned To'],
+            resolved_date=last_updated_date if item['Resolved Status'] == 'Yes' else None
         )
         
         # Add the new instance to the session
@@ -0,0 +1,66 @@
+from sqlalchemy import inspect, text
+from extensions import db
+from feedback.models import Feedback, Category, Section, Priority, Assignee, LOOKUP_MODELS, clear_lookup_caches
+from app import create_app
+
+# Old string column on the feedback table -> lookup model that replaces it
+LOOKUP_COLUMNS = [
+    ("category", Category),
+    ("related_section", Section),
+    ("priority_level", Priority),
+    ("assigned_to", Assignee),
+]
+
+def migrate_feedback_table(connection):
+    """Move the repeated string columns of an existing feedback table into lookup tables.
+
+    Returns True if the table was migrated, or False if it already uses the new schema.
+    """
+    columns = {column["name"] for column in inspect(connection).get_columns("feedback")}
+    if "category_id" in columns:
+        return False
+
+    # Create the lookup tables and fill them with every distinct value in use
+    for model in LOOKUP_MODELS:
+        model.__table__.create(connection, checkfirst=True)
+    for column, model in LOOKUP_COLUMNS:
+        table = model.__tablename__
+        connection.execute(text(
+            f"INSERT INTO {table} (name) SELECT DISTINCT {column} FROM feedback "
+            f"WHERE {column} IS NOT NULL AND {column} NOT IN (SELECT name FROM {table})"
+        ))
+
+    # Rebuild the feedback table with integer foreign keys and a boolean resolved flag
+    connection.execute(text("ALTER TABLE feedback RENAME TO feedback_old"))
+    Feedback.__table__.create(connection)
+    connection.execute(text(
+        "INSERT INTO feedback (id, category_id, description, resolved, priority_level_id, related_section_id, "
+        "created_date, last_updated_date, assigned_to_id, resolved_date) "
+        "SELECT f.id, c.id, f.description, "
+        "CASE WHEN lower(trim(f.resolved_status)) IN ('yes', 'true', '1') THEN 1 ELSE 0 END, "
+        "p.id, s.id, f.created_date, f.last_updated_date, a.id, "
+        "CASE WHEN lower(trim(f.resolved_status)) IN ('yes', 'true', '1') THEN f.last_updated_date END "
+        "FROM feedback_old f "
+        "JOIN category c ON c.name = f.category "
+        "LEFT JOIN priority p ON p.name = f.priority_level "
+        "LEFT JOIN section s ON s.name = f.related_section "
+        "LEFT JOIN assignee a ON a.name = f.assigned_to"
+    ))
+    connection.execute(text("DROP TABLE feedback_old"))
+
+    clear_lookup_caches()
+    return True
+
+if __name__ == "__main__":
+    app = create_app()
+    with app.app_context():
+        with db.engine.begin() as connection:
+            migrated = migrate_feedback_table(connection)
+
+        if migrated:
+            # Reclaim the space freed by the old string columns (VACUUM cannot run inside a transaction)
+            with db.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+                connection.execute(text("VACUUM"))
+            print("Feedback table successfully migrated to lookup tables!")
+        else:
+            print("Feedback table already uses lookup tables, nothing to migrate.")
@@ -1,15 +1,21 @@
 import pytest
-from app import app
+from app import create_app
+from config import TestingConfig
 from extensions import db
-from feedback.models import Feedback
-from datetime import datetime, timezone
+from feedback.models import Feedback, FeedbackChange, FeedbackDailyRollup, Category
+from feedback.rollups import backfill_daily_rollups
+from feedback.admission import get_write_gate
+from feedback.partitions import feedback_source, partition_feedback
+from feedback.changes import seed_change_log
+from migrate_lookup_tables import migrate_feedback_table
+from sqlalchemy import text
+from sqlalchemy.schema import CreateTable
+from datetime import date, datetime, timezone
 import json
 
 @pytest.fixture
 def test_app():
-    app.config['TESTING'] = True
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///test_feedback.db'
-    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app = create_app(TestingConfig)
 
     with app.app_context():
         db.create_all()
@@ -21,6 +27,20 @@ def test_app():
 def client(test_app):
     return test_app.test_client()
 
+def test_create_app_creates_schema_on_first_request():
+    """Test that the app factory defers table creation until the first request."""
+    app = create_app(TestingConfig)
+
+    with app.app_context():
+        assert "feedback" not in db.inspect(db.engine).get_table_names()
+
+    response = app.test_client().get("/feedback/")
+    assert response.status_code == 200
+
+    with app.app_context():
+        assert "feedback" in db.inspect(db.engine).get_table_names()
+        db.drop_all()
+
 def test_add_feedback(client):
     """Test the add_feedback route to ensure feedback is added correctly."""
     
@@ -350,3 +370,446 @@ def test_archive_old_feedback(client):
     assert response.status_code == 200
     assert response.json["message"] == "Old feedback comments archived successfully."
 
+# Test for the lookup table columns
+def test_lookup_columns_share_rows(client):
+    feedback1 = Feedback(category="Shared", description="First.", resolved_status="Yes",
+                         priority_level="High", related_section="Appendix", assigned_to="User")
+    feedback2 = Feedback(category="Shared", description="Second.", resolved_status="No",
+                         priority_level="Low", related_section="Appendix", assigned_to="User")
+    db.session.add_all([feedback1, feedback2])
+    db.session.commit()
+
+    assert feedback1.category_id == feedback2.category_id
+    assert feedback1.related_section_id == feedback2.related_section_id
+    assert feedback1.resolved is True and feedback2.resolved is False
+    assert Category.query.filter_by(name="Shared").count() == 1
+
+    # The string attributes still work in queries
+    assert Feedback.query.filter(Feedback.category == "Shared").count() == 2
+    assert Feedback.query.filter(Feedback.resolved_status == "Yes").one().description == "First."
+
+# Test for migrate_feedback_table
+def test_migrate_feedback_table(client):
+    # Replace the feedback table with the old string-based schema
+    db.session.remove()
+    with db.engine.begin() as connection:
+        connection.execute(text("DROP TABLE feedback"))
+        connection.execute(text(
+            "CREATE TABLE feedback (id INTEGER PRIMARY KEY, category VARCHAR(100) NOT NULL, "
+            "description VARCHAR(1000) NOT NULL, resolved_status VARCHAR(5) NOT NULL, "
+            "priority_level VARCHAR(50), related_section VARCHAR(50), created_date DATETIME, "
+            "last_updated_date DATETIME, assigned_to VARCHAR(50))"
+        ))
+        connection.execute(text(
+            "INSERT INTO feedback VALUES "
+            "(1, 'Structure', 'Old feedback 1.', 'Yes', 'High', 'Appendix', '2022-01-01 00:00:00', '2022-01-01 00:00:00', 'User1'), "
+            "(2, 'Structure', 'Old feedback 2.', 'No', NULL, 'Abstract', '2022-01-02 00:00:00', '2022-01-02 00:00:00', NULL)"
+        ))
+
+    with db.engine.begin() as connection:
+        assert migrate_feedback_table(connection) is True
+    with db.engine.begin() as connection:
+        assert migrate_feedback_table(connection) is False
+
+    migrated = Feedback.query.order_by(Feedback.id).all()
+    assert [feedback.to_dict() for feedback in migrated] == [
+        {"id": 1, "category": "Structure", "description": "Old feedback 1.", "resolved_status": "Yes",
+         "priority_level": "High", "related_section": "Appendix", "assigned_to": "User1",
+         "created_date": "01/01/2022", "last_updated_date": "01/01/2022"},
+        {"id": 2, "category": "Structure", "description": "Old feedback 2.", "resolved_status": "No",
+         "priority_level": None, "related_section": "Abstract", "assigned_to": None,
+         "created_date": "02/01/2022", "last_updated_date": "02/01/2022"},
+    ]
+
+# Test for get_feedback_trends
+def test_get_feedback_trends(client):
+    # Prepopulate data across two days of the same week
+    feedback1 = Feedback(category="Trend", description="Trend feedback 1.", resolved_status="No",
+                         priority_level="High", related_section="Appendix", assigned_to="User",
+                         created_date=datetime(2024, 11, 4, 9, 0))
+    feedback2 = Feedback(category="Trend", description="Trend feedback 2.", resolved_status="No",
+                         priority_level="Low", related_section="Abstract", assigned_to="User",
+                         created_date=datetime(2024, 11, 5, 9, 0))
+    db.session.add_all([feedback1, feedback2])
+    db.session.commit()
+
+    # Resolve one comment on a later day
+    feedback1.resolved_status = "Yes"
+    feedback1.resolved_date = datetime(2024, 11, 6, 9, 0)
+    db.session.commit()
+
+    response = client.get("/feedback/trends?start=2024-11-01&end=2024-11-30")
+    assert response.status_code == 200
+    assert response.json["trends"] == [
+        {"period": "2024-11-04", "created": 1, "resolved": 0},
+        {"period": "2024-11-05", "created": 1, "resolved": 0},
+        {"period": "2024-11-06", "created": 0, "resolved": 1},
+    ]
+
+    response = client.get("/feedback/trends?granularity=week&group_by=section")
+    assert response.status_code == 200
+    assert response.json["trends"] == [
+        {"period": "2024-11-04", "related_section": "Appendix", "created": 1, "resolved": 1},
+        {"period": "2024-11-04", "related_section": "Abstract", "created": 1, "resolved": 0},
+    ]
+
+    # A range starting mid-week still counts the whole first week
+    response = client.get("/feedback/trends", query_string={"granularity": "week", "start": " 2024-11-05 ", "end": "2024-11-05"})
+    assert response.json["trends"] == [{"period": "2024-11-04", "created": 2, "resolved": 1}]
+
+    response = client.get("/feedback/trends?granularity=month")
+    assert response.status_code == 400
+
+# Test that the incremental rollups match a full backfill
+def test_rollups_match_backfill(client):
+    feedbacks = [
+        Feedback(category="Rollup", description=f"Rollup feedback {i}.", resolved_status="Yes" if i % 2 else "No",
+                 priority_level="High" if i % 3 else None, related_section="Appendix" if i % 2 else "Abstract",
+                 assigned_to="User", created_date=datetime(2024, 1, 1 + i))
+        for i in range(6)
+    ]
+    db.session.add_all(feedbacks)
+    db.session.commit()
+
+    # Exercise the edit, delete and bulk write paths
+    client.post(f"/feedback/edit/{feedbacks[0].id}", data={
+        "category": "Rollup", "description": "Edited.", "resolved_status": "Yes",
+        "priority_level": "Low", "related_section": "Executive Summary", "assigned_to": "User"})
+    client.post(f"/feedback/delete/{feedbacks[1].id}")
+    client.post("/feedback/bulk-upload", json={"feedbacks": [
+        {"category": "Other", "description": "Bulk.", "resolved_status": "No", "priority_level": "Low",
+         "related_section": "Abstract", "assigned_to": "User"}]})
+    client.delete("/feedback/delete-by-category?category=Other")
+
+    def rollup_rows():
+        rows = FeedbackDailyRollup.query.filter(
+            (FeedbackDailyRollup.created_count != 0) | (FeedbackDailyRollup.resolved_count != 0))
+        return sorted((row.day, row.related_section_id, row.priority_level_id, row.created_count, row.resolved_count)
+                      for row in rows)
+
+    incremental = rollup_rows()
+    assert incremental
+    backfill_daily_rollups()
+    assert rollup_rows() == incremental
+
+# Test for get_feedback_changes
+def test_get_feedback_changes(client):
+    response = client.get("/feedback/changes")
+    assert response.status_code == 200
+    assert response.json == {"changes": [], "next_cursor": 0, "has_more": False}
+
+    # Prepopulate data
+    feedback1 = Feedback(category="Sync", description="Sync feedback 1.", resolved_status="No",
+                         priority_level="Low", related_section="Abstract", assigned_to="User")
+    feedback2 = Feedback(category="Sync", description="Sync feedback 2.", resolved_status="No",
+                         priority_level="Low", related_section="Abstract", assigned_to="User")
+    db.session.add_all([feedback1, feedback2])
+    db.session.commit()
+
+    response = client.get("/feedback/changes?since=0&limit=1")
+    assert response.status_code == 200
+    assert [change["operation"] for change in response.json["changes"]] == ["insert"]
+    assert response.json["has_more"] is True
+
+    response = client.get("/feedback/changes?since=0")
+    cursor = response.json["next_cursor"]
+    assert [change["feedback"]["description"] for change in response.json["changes"]] == ["Sync feedback 1.", "Sync feedback 2."]
+
+    # Update one comment through the bulk endpoint and delete the other
+    client.put("/feedback/update-category", json={"feedback_ids": [feedback1.id], "new_category": "Synced"})
+    client.post(f"/feedback/delete/{feedback2.id}")
+
+    response = client.get(f"/feedback/changes?since={cursor}")
+    changes = response.json["changes"]
+    assert [(change["id"], change["operation"]) for change in changes] == [(feedback1.id, "update"), (feedback2.id, "delete")]
+    assert changes[0]["feedback"]["category"] == "Synced"
+    assert changes[1]["feedback"] is None
+    assert response.json["next_cursor"] > cursor
+
+    # Nothing new after the latest cursor
+    response = client.get(f"/feedback/changes?since={response.json['next_cursor']}")
+    assert response.json["changes"] == []
+
+    response = client.get("/feedback/changes?since=abc")
+    assert response.status_code == 400
+
+    # Non-finite waits would never time out
+    for wait in ("nan", "inf", "-inf"):
+        response = client.get(f"/feedback/changes?wait={wait}")
+        assert response.status_code == 400
+
+# Test for get_similar_feedback
+def test_get_similar_feedback(client):
+    # Prepopulate data with a near-duplicate pair and an unrelated comment
+    original = Feedback(category="Structure", description="More use should have been made of the appendix, to de-clutter the document.",
+                        resolved_status="No", priority_level="Medium", related_section="Appendix", assigned_to="User")
+    near_duplicate = Feedback(category="Structure", description="More use should have been made of the appendix to de-clutter the document",
+                              resolved_status="No", priority_level="Medium", related_section="Appendix", assigned_to="User")
+    unrelated = Feedback(category="Detail", description="The executive summary is far too long.",
+                         resolved_status="No", priority_level="Low", related_section="Executive Summary", assigned_to="User")
+    db.session.add_all([original, near_duplicate, unrelated])
+    db.session.commit()
+
+    response = client.get(f"/feedback/{original.id}/similar")
+    assert response.status_code == 200
+    assert [match["id"] for match in response.json] == [near_duplicate.id]
+    assert response.json[0]["similarity"] >= 0.8
+
+    # Editing the description updates the index
+    near_duplicate.description = "Completely different wording about the references."
+    db.session.commit()
+    response = client.get(f"/feedback/{original.id}/similar")
+    assert response.json == []
+
+    # Only the comments sharing the most buckets are compared, so many stored copies return the first ten
+    copies = [Feedback(category="Structure", description=original.description, resolved_status="No",
+                       priority_level="Medium", related_section="Appendix", assigned_to="User") for _ in range(60)]
+    db.session.add_all(copies)
+    db.session.commit()
+    response = client.get(f"/feedback/{original.id}/similar")
+    assert [match["id"] for match in response.json] == [copy.id for copy in copies[:10]]
+
+    response = client.get(f"/feedback/{original.id}/similar?threshold=2")
+    assert response.status_code == 400
+    response = client.get(f"/feedback/{original.id}/similar?threshold=0.3")
+    assert response.status_code == 400
+
+# Test for near-duplicate handling in bulk_upload_feedback
+def test_bulk_upload_flags_near_duplicates(client):
+    entry = {"category": "Detail", "description": "An appendix should have been included.", "resolved_status": "No",
+             "priority_level": "Low", "related_section": "Appendix", "assigned_to": "User"}
+    repeat = dict(entry, description="An appendix should have been included!")
+
+    response = client.post("/feedback/bulk-upload", json={"feedbacks": [entry, repeat]})
+    assert response.status_code == 201
+    assert [duplicate["index"] for duplicate in response.json["duplicates"]] == [1]
+    assert Feedback.query.count() == 2
+    original_id = Feedback.query.filter_by(description=entry["description"]).one().id
+    assert response.json["duplicates"][0]["similar_to"] == [original_id]
+
+    # Skipping leaves the near-duplicate out of the upload
+    response = client.post("/feedback/bulk-upload", json={"feedbacks": [repeat], "on_duplicate": "skip"})
+    assert response.status_code == 201
+    assert len(response.json["duplicates"]) == 1
+    assert Feedback.query.count() == 2
+
+    # Within one upload, a skipped entry is not matched by the entries after it
+    other = dict(entry, description="The references are not in a consistent style.")
+    other_repeat = dict(other, description="The references are not in a consistent style!")
+    response = client.post("/feedback/bulk-upload", json={"feedbacks": [other, other_repeat, other_repeat], "on_duplicate": "skip"})
+    other_id = Feedback.query.filter_by(description=other["description"]).one().id
+    assert response.json["duplicates"] == [{"index": 1, "similar_to": [other_id]}, {"index": 2, "similar_to": [other_id]}]
+    assert Feedback.query.count() == 3
+
+# Tests for admission control on the bulk endpoints
+def test_bulk_upload_rejects_oversized_requests(test_app, client):
+    test_app.config["BULK_MAX_CONTENT_LENGTH"] = 100
+    response = client.post("/feedback/bulk-upload", json={"feedbacks": [{"description": "x" * 200}]})
+    assert response.status_code == 413
+
+    test_app.config["BULK_MAX_CONTENT_LENGTH"] = 1024 * 1024
+    test_app.config["BULK_MAX_ITEMS"] = 1
+    response = client.put("/feedback/update-category", json={"feedback_ids": [1, 2], "new_category": "New"})
+    assert response.status_code == 413
+
+def test_write_requests_wait_for_a_free_slot(test_app, client):
+    test_app.config.update(WRITE_CONCURRENCY_LIMIT=1, WRITE_QUEUE_TIMEOUT=0.05, WRITE_RETRY_AFTER=3)
+    gate = get_write_gate(test_app)
+
+    # Hold the only write slot, as a long-running bulk request would
+    gate.semaphore.acquire()
+    try:
+        response = client.post("/feedback/archive", json={"date_threshold": "2023-01-01"})
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "3"
+
+        # With the queue full, requests are turned away without waiting
+        gate.queue_limit = 0
+        response = client.post("/feedback/archive", json={"date_threshold": "2023-01-01"})
+        assert response.status_code == 429
+        assert response.headers["Retry-After"] == "3"
+    finally:
+        gate.semaphore.release()
+
+    response = client.post("/feedback/archive", json={"date_threshold": "2023-01-01"})
+    assert response.status_code == 200
+
+# Test for partition_feedback and reads across partitions
+def test_partitioned_feedback(tmp_path):
+    config = type("PartitionedConfig", (TestingConfig,), {"PARTITION_DIR": str(tmp_path)})
+    app = create_app(config)
+    client = app.test_client()
+
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([
+            Feedback(category="Old", description="Old feedback 1.", resolved_status="No", related_section="Appendix",
+                     created_date=datetime(2022, 3, 1)),
+            Feedback(category="Old", description="Old feedback 2.", resolved_status="No", related_section="Appendix",
+                     created_date=datetime(2022, 6, 1)),
+            Feedback(category="New", description="New feedback.", resolved_status="No", related_section="Appendix",
+                     created_date=datetime(2024, 2, 1)),
+        ])
+        db.session.commit()
+
+        assert partition_feedback(2024) == {2022: 2}
+        assert (tmp_path / "feedback_2022.db").exists()
+        assert Feedback.query.count() == 1
+
+        # Unbounded reads see every partition, bounded reads skip partitions outside the range
+        assert feedback_source() is not Feedback
+        assert feedback_source(date(2024, 1, 1), None) is Feedback
+
+        # Seeding the change log of an older database includes partitioned comments
+        db.session.execute(FeedbackChange.__table__.delete())
+        db.session.commit()
+        assert seed_change_log() == 3
+
+    response = client.get("/feedback/")
+    assert b"Old feedback 1." in response.data and b"New feedback." in response.data
+
+    response = client.get("/feedback/", query_string={"start": "2024-01-01"})
+    assert b"Old feedback 1." not in response.data and b"New feedback." in response.data
+
+    response = client.get("/feedback/search?phrase=feedback&start=2022-01-01&end=2022-03-31")
+    assert [feedback["description"] for feedback in response.json] == ["Old feedback 1."]
+
+    # A malformed range is rejected the same way by the dashboard and search
+    assert client.get("/feedback/", query_string={"start": "2024-13-01"}).status_code == 400
+    assert client.get("/feedback/search", query_string={"phrase": "feedback", "end": "soon"}).status_code == 400
+
+    response = client.get("/feedback/counts")
+    assert b"<li><strong>Appendix:</strong> 3</li>" in response.data
+
+    # Partitioned comments are reported as read-only instead of looking missing
+    response = client.get("/feedback/")
+    assert response.data.count(b"Read-only</span>") == 2 and response.data.count(b"Delete</button>") == 1
+    assert client.get("/feedback/edit/1").status_code == 409
+    assert client.post("/feedback/delete/1").status_code == 409
+    assert client.post("/feedback/delete/99").status_code == 404
+
+    response = client.put("/feedback/update-category", json={"feedback_ids": [1, 3], "new_category": "Moved"})
+    assert response.status_code == 200 and response.json["read_only_ids"] == [1]
+    response = client.delete("/feedback/delete-by-category?category=Old")
+    assert response.status_code == 200 and response.json["read_only_ids"] == [1, 2]
+
+    # Partitioned comments stay in the near-duplicate index
+    entry = {"category": "Old", "description": "Old feedback 1.", "resolved_status": "No", "priority_level": "Low",
+             "related_section": "Appendix", "assigned_to": "User"}
+    response = client.post("/feedback/bulk-upload", json={"feedbacks": [entry]})
+    assert response.json["duplicates"] == [{"index": 0, "similar_to": [1]}]
+    response = client.get("/feedback/1/similar?threshold=1")
+    assert response.status_code == 200 and [match["description"] for match in response.json] == ["Old feedback 1."]
+
+    # Partitions are attached read-only
+    with app.app_context():
+        with pytest.raises(Exception):
+            db.session.execute(text("DELETE FROM p2022.feedback"))
+        db.session.rollback()
+        db.drop_all()
+
+# Test that ids of partitioned comments are never reused, even on a database created before AUTOINCREMENT
+def test_partitioned_ids_not_reused(tmp_path):
+    config = type("PartitionedConfig", (TestingConfig,), {"PARTITION_DIR": str(tmp_path)})
+    app = create_app(config)
+    client = app.test_client()
+
+    with app.app_context():
+        db.create_all()
+        legacy = str(CreateTable(Feedback.__table__).compile(db.engine)).replace(" AUTOINCREMENT", "")
+        db.session.execute(text("DROP TABLE feedback"))
+        db.session.execute(text(legacy))
+        db.session.add_all([
+            Feedback(category="Old", description=f"Old feedback {year}.", resolved_status="No",
+                     related_section="Appendix", created_date=datetime(year, 3, 1))
+            for year in (2020, 2021, 2022)
+        ] + [Feedback(category="New", description="New feedback.", resolved_status="No",
+                      related_section="Appendix", created_date=datetime(2024, 2, 1))])
+        db.session.commit()
+
+        assert partition_feedback(2023) == {2020: 1, 2021: 1, 2022: 1}
+        assert "AUTOINCREMENT" in db.session.execute(
+            text("SELECT sql FROM sqlite_master WHERE name = 'feedback'")).scalar()
+
+        # Delete the highest-id comment, the only one left in the main table
+        db.session.delete(Feedback.query.one())
+        db.session.commit()
+
+    client.post("/feedback/add", data={"category": "Fresh", "description": "Fresh feedback.", "resolved_status": "No",
+                                       "priority_level": "Low", "related_section": "Appendix", "assigned_to": "User"})
+    with app.app_context():
+        assert Feedback.query.filter_by(description="Fresh feedback.").one().id == 5
+
+    response = client.get("/feedback/search?phrase=feedback")
+    assert sorted(feedback["id"] for feedback in response.json) == [1, 2, 3, 5]
+
+    with app.app_context():
+        db.drop_all()
+
+# Test that more partition files than SQLite can attach are served and then merged
+def test_partition_attachment_limit(tmp_path):
+    unlimited = create_app(type("UnlimitedConfig", (TestingConfig,), {
+        "PARTITION_DIR": str(tmp_path), "PARTITION_MAX_ATTACHED": 100}))
+    app = create_app(type("PartitionedConfig", (TestingConfig,), {"PARTITION_DIR": str(tmp_path)}))
+
+    with unlimited.app_context():
+        db.create_all()
+        db.session.add_all([
+            Feedback(category="Old", description=f"Feedback {year}.", resolved_status="No",
+                     related_section="Appendix", created_date=datetime(year, 3, 1))
+            for year in range(2010, 2022)
+        ] + [Feedback(category="New", description="Feedback 2024.", resolved_status="No",
+                      related_section="Appendix", created_date=datetime(2024, 2, 1))])
+        db.session.commit()
+        assert len(partition_feedback(2022)) == 12
+
+    # Twelve files are over SQLite's limit of ten: the newest ten are attached instead of failing
+    client = unlimited.test_client()
+    assert client.get("/feedback/").status_code == 200
+    response = client.get("/feedback/search?phrase=feedback")
+    assert sorted(feedback["description"] for feedback in response.json)[:2] == ["Feedback 2012.", "Feedback 2013."]
+
+    # Partitioning again merges the oldest years until PARTITION_MAX_ATTACHED files are left
+    with app.app_context():
+        Feedback.query.filter_by(description="Feedback 2024.").one().created_date = datetime(2011, 9, 1)
+        db.session.commit()
+        assert partition_feedback(2022) == {2011: 1}
+    assert sorted(path.name for path in tmp_path.iterdir())[:2] == ["feedback_2010-2014.db", "feedback_2015.db"]
+    assert len(list(tmp_path.iterdir())) == 8
+
+    client = app.test_client()
+    response = client.get("/feedback/search?phrase=feedback")
+    assert len(response.json) == 13
+    response = client.get("/feedback/search?phrase=feedback&start=2011-01-01&end=2011-12-31")
+    assert sorted(feedback["description"] for feedback in response.json) == ["Feedback 2011.", "Feedback 2024."]
+
+    with app.app_context():
+        db.drop_all()
+
+# Test that lookup ids are only cached once committed
+def test_lookup_ids_cached_after_commit(client):
+    category_id = Category.id_for("Uncommitted")
+    assert "Uncommitted" not in Category._cache()["by_name"]
+    assert Category.id_for("Uncommitted") == category_id
+    db.session.rollback()
+    assert "Uncommitted" not in Category._cache()["by_name"]
+    assert Category.id_for("Uncommitted", create=False) is None
+
+    category_id = Category.id_for("Committed")
+    db.session.commit()
+    assert Category._cache()["by_name"]["Committed"] == category_id
+
+# Test that bulk_upload_feedback accepts non-string resolved statuses
+def test_bulk_upload_boolean_resolved_status(client):
+    data = {"feedbacks": [{"category": "Detail", "description": "Boolean status.", "resolved_status": True,
+                           "priority_level": "Low", "related_section": "Abstract", "assigned_to": "User"}]}
+    response = client.post("/feedback/bulk-upload", json=data)
+    assert response.status_code == 201
+    assert Feedback.query.filter_by(description="Boolean status.").one().resolved_status == "Yes"
+
+# Test that bulk_upload_feedback accepts non-string descriptions
+def test_bulk_upload_numeric_description(client):
+    data = {"feedbacks": [{"category": "Detail", "description": 123, "resolved_status": "No",
+                           "priority_level": "Low", "related_section": "Abstract", "assigned_to": "User"}]}
+    response = client.post("/feedback/bulk-upload", json=data)
+    assert response.status_code == 201